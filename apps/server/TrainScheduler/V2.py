@@ -18,6 +18,7 @@ from tabulate import tabulate
 import sys
 from datetime import datetime
 from collections import deque
+from output_writer import OutputWriter
 
 class EnhancedDynamicHeadwayTrainScheduler:
     def __init__(self, data_file='train_data.json'):
@@ -983,15 +984,12 @@ class EnhancedDynamicHeadwayTrainScheduler:
         
         # Save to JSON file
         try:
-            with open(filename, 'w') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
-            print(f"✓ Dynamic headway results saved successfully to {filename}")
-            
-            # Also create comprehensive output files like the enhanced fixed version
-            # Save train_schedule_output.json (comprehensive format)
+            # The comprehensive train_schedule_output.json has the same content:
+            # serialise once and write both files from the same bytes
             comprehensive_filename = "train_schedule_output.json"
-            with open(comprehensive_filename, 'w') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
+            writer = OutputWriter()
+            writer.write(output_data, [filename, comprehensive_filename])
+            print(f"✓ Dynamic headway results saved successfully to {filename}")
             print(f"✓ Comprehensive results saved to {comprehensive_filename}")
             
             # Create summary file
@@ -1012,8 +1010,7 @@ class EnhancedDynamicHeadwayTrainScheduler:
                 }
             }
             
-            with open(summary_filename, 'w') as f:
-                json.dump(summary_data, f, indent=2, ensure_ascii=False)
+            writer.write(summary_data, [summary_filename])
             print(f"✓ Summary saved to {summary_filename}")
             
         except Exception as e:
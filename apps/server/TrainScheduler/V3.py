@@ -10,93 +10,224 @@ Author: Enhanced Dynamic Headway Version V2 - Single Output
 Date: Sep 24, 2025
 """
 
-import pulp
 from pulp import LpMinimize, LpVariable, LpProblem, lpSum, LpStatus, value
+from pulp import LpAffineExpression, LpConstraint, LpConstraintEQ, LpConstraintGE
+from pulp import LpStatusOptimal, LpSolutionOptimal, LpSolutionIntegerFeasible
 import json
-from pathlib import Path
+import os
+import numpy as np
 import sys
+import time
+import argparse
 from datetime import datetime
-from collections import deque
+from headway import DynamicHeadwayEngine
+from routing import SectionRouter
+from solvers import SOLVER_BACKENDS, make_backend
+from dispatch import GreedyDispatcher
+from rolling_horizon import RollingHorizonSolver
+from decomposition import DecompositionSolver
+from portfolio import PortfolioSolver
+from reschedule import DisruptionRescheduler, load_previous_schedule
+from result_cache import ResultCache, cache_key
+from compiled_model import ModelCache, ModelSkeleton, SkeletonMismatch, topology_key
+from solution import SolutionSnapshot
+from network import Network, Timetable, TrainInfo
+from train_data import read_train_data
+from output_writer import OutputWriter
+
+# Timeline event types by code (SolutionSnapshot.event_columns)
+EVENT_TYPES = ('departure', 'arrival')
 
 class EnhancedDynamicHeadwayTrainScheduler:
-    def __init__(self, data_file='train_data.json'):
-        """Initialize the train scheduler with data from file."""
-        self.load_data(data_file)
+    def __init__(self, data_file='train_data.json', sparse=True, data=None, model_cache=None, network=None):
+        """
+        Initialize the train scheduler with data from file (or from an
+        already-parsed input dict passed as data).
+        With sparse=True only (train, section) pairs on a train's path and
+        train pairs that actually share a section get model variables.
+        With a model_cache (compiled_model.ModelCache), full models are
+        built by updating a compiled skeleton of the same topology.
+        With a network (network.Network, e.g. a memory-mapped network
+        file), the input only needs the train part.
+        """
+        self.sparse = sparse
+        self.load_data(data_file, data, network)
         self.model = None
+        self.model_cache = model_cache
+        self._skeleton = None
+        self.solution_method = 'mip'
+        self.solution_status = None
+        self.solution_details = {}
+        self._set_scope()
+        self._reset_variables()
+    
+    def _reset_variables(self):
+        """Drop all model variables (before building a new model)."""
+        self.solution = None
         self.selected = {}
         self.tin = {}
         self.tout = {}
         self.completion_time = {}
         self.train_stopped = {}
         self.order_on_section = {}
-        self.safe_separation_time = {}
+        self.station_order = {}
+    
+    def _set_scope(self, trains=None, fixed=None, pinned=None, release=None):
+        """
+        Select the trains the next model optimises.
+        trains:  trains to optimise (default: all trains)
+        fixed:   schedule ({'tin', 'tout', 'stopped'}) of already-decided trains;
+                 running fixed trains enter the model with their times pinned
+        pinned:  {(train, section): (tin, tout)} already-run path prefixes of
+                 optimised trains
+        release: {(train, section): earliest entry} of optimised trains
+        """
+        self.active_trains = set(self.trains if trains is None else trains)
+        self.pinned = dict(pinned or {})
+        release = dict(release or {})
+        release.update((key, tin) for key, (tin, tout) in self.pinned.items())
+        self.fixed_schedule = fixed or {'tin': {}, 'tout': {}, 'stopped': {}}
+        self.fixed_trains = {
+            t for t, stopped in self.fixed_schedule['stopped'].items()
+            if not stopped and t not in self.active_trains and self.train_info[t].has_valid_path
+        }
+        self.model_trains = sorted(self.active_trains | self.fixed_trains)
         
-    def load_data(self, data_file):
-        """Load data from JSON file and calculate priorities."""
+        # Fixed trains have point windows at their scheduled times
+        self.tin_window = dict(self.base_tin_window)
+        self.tout_window = dict(self.base_tout_window)
+        if self.fixed_trains or release:
+            # Running the rest of the optimised trains serially after all fixed
+            # and pinned events is always feasible, so the horizon may need to
+            # stretch to cover it
+            last = max([self.fixed_schedule['tout'][t, self.train_info[t].path[-1]]
+                        for t in self.fixed_trains] +
+                       [tout for tin, tout in self.pinned.values()], default=None)
+            active = [t for t in self.trains_with_paths if t in self.active_trains]
+            horizon = max(self.horizon, self._serial_makespan(active, last, release, self.pinned))
+            tin_window, tout_window = self._time_windows(active, horizon, release)
+            self.tin_window.update(tin_window)
+            self.tout_window.update(tout_window)
+        for t in self.fixed_trains:
+            for s in self.train_info[t].path:
+                tin = self.fixed_schedule['tin'][t, s]
+                tout = self.fixed_schedule['tout'][t, s]
+                self.tin_window[t, s] = (tin, tin)
+                self.tout_window[t, s] = (tout, tout)
+        for key, (tin, tout) in self.pinned.items():
+            self.tin_window[key] = (tin, tin)
+            self.tout_window[key] = (tout, tout)
+    
+    def _is_pinned(self, t, s):
+        """True if the times of train t on section s are fixed in the current model."""
+        return t in self.fixed_trains or (t, s) in self.pinned
+    
+    def _in_scope(self, t1, t2, s1=None, s2=None):
+        """
+        True if a train pair (on sections s1/s2) needs interaction constraints
+        in the current model: both trains are in the model and not both pinned.
+        """
+        return (t1 in self.fixed_trains or t1 in self.active_trains) and \
+            (t2 in self.fixed_trains or t2 in self.active_trains) and \
+            not (self._is_pinned(t1, s1) and self._is_pinned(t2, s2))
+    
+    def _section_pair_needed(self, t1, t2, s):
+        """
+        True if trains t1 and t2 (in section_trains order) need an ordering
+        binary and headway rows on section s: the pair is in scope and their
+        entry windows are not already far enough apart for either order
+        (the headway, or the overtake gap when the slower train t2 leads).
+        """
+        if not self._in_scope(t1, t2, s, s):
+            return False
+        window1 = self.tin_window.get((t1, s))
+        window2 = self.tin_window.get((t2, s))
+        if window1 is None or window2 is None:
+            return True
+        t1_first = self.headways.headway(t1, t2, s)
+        t2_first = max(self.headways.headway(t2, t1, s), self._overtake_gap(t1, t2, s))
+        return not (window2[0] >= window1[1] + t1_first or window1[0] >= window2[1] + t2_first)
+    
+    def _overtake_gap(self, t1, t2, s):
+        """Gap the faster train t1 keeps behind a slower t2 that enters section s first (0 if t1 is not faster)."""
+        if self.train_section_speeds[t1][s] > self.train_section_speeds[t2][s]:
+            return self.headways.clear_time[s][self.headways.position[s][t2]] * 0.8
+        return 0.0
+        
+    def load_data(self, data_file, data=None, network=None):
+        """
+        Load data from JSON file (unless data is given) and calculate
+        priorities. The stations and sections come from network if given.
+        """
         try:
-            with open(data_file, 'r') as f:
-                data = json.load(f)
+            if data is None:
+                data = read_input(data_file)
+            
+            # Network and trains as id-indexed arrays (network.py)
+            self.network = network if network is not None else Network.from_json(data)
+            self.timetable = Timetable.from_json(data)
             
-            # Extract data from JSON
-            self.nb_stations = data['nb_stations']
+            self.nb_stations = self.network.nb_stations
             self.stations = range(1, self.nb_stations + 1)
-            self.station_names = {int(k): v for k, v in data['station_names'].items()}
+            self.station_names = self.network.station_names
             
-            self.nb_sections = data['nb_sections']
+            self.nb_sections = self.network.nb_sections
             self.sections = range(1, self.nb_sections + 1)
             
-            self.nb_trains = data['nb_trains']
+            self.nb_trains = self.timetable.nb_trains
             self.trains = range(1, self.nb_trains + 1)
             
-            self.sec_from = {int(k): v for k, v in data['sec_from'].items()}
-            self.sec_to = {int(k): v for k, v in data['sec_to'].items()}
-            self.sec_dist = {int(k): v for k, v in data['sec_dist'].items()}
-            self.sec_vmax = {int(k): v for k, v in data['sec_vmax'].items()}
+            # Scalar lookups in the model loops index plain lists
+            self.sec_from, self.sec_to, self.sec_dist, self.sec_vmax = self.network.tables()
+            (self.start_station, self.end_station, self.train_vmax,
+             self.train_headway, self.earliest_departure) = self.timetable.tables()
+            self.allowed_sections = self.timetable.allowed
             
-            self.allowed_sections = {}
-            for t, sections in data['allowed_sections'].items():
-                self.allowed_sections[int(t)] = {int(s): v for s, v in sections.items()}
-            
-            self.start_station = {int(k): v for k, v in data['start_station'].items()}
-            self.end_station = {int(k): v for k, v in data['end_station'].items()}
-            self.train_vmax = {int(k): v for k, v in data['train_vmax'].items()}
-            
-            # Load headway data from file (if available)
+            # Report where the headway values come from
             if 'headway' in data:
-                if isinstance(data['headway'], dict):
+                if isinstance(data['headway'], (dict, list)):
                     # Per-train headway values
-                    self.train_headway = {int(k): v for k, v in data['headway'].items()}
-                    self.min_headway = min(self.train_headway.values())
+                    self.min_headway = min(self.train_headway[1:])
                     print(f"Using per-train headway values from file (min: {self.min_headway} minutes)")
                 else:
                     # Single headway value for all trains
-                    headway_value = data['headway']
-                    self.train_headway = {t: headway_value for t in self.trains}
-                    self.min_headway = headway_value
-                    print(f"Using single headway value from file: {headway_value} minutes for all trains")
+                    self.min_headway = data['headway']
+                    print(f"Using single headway value from file: {self.min_headway} minutes for all trains")
             else:
                 # Fallback to default headway values
-                self.train_headway = {t: 1.0 for t in self.trains}
                 self.min_headway = 1.0
                 print("No headway data in file, using default 1.0 minutes")
             
             # Safety parameters for dynamic headway
             self.safety_margin = 1.5  # Additional safety factor
-            self.BIG_M = 10000
+            self.station_min_separation = 2.0  # Minimum minutes between station events
             
             # Calculate train paths and info
             self.train_info = self._calculate_train_info()
             self.train_section_speeds = self._calculate_section_speeds()
             
             # Identify trains with no valid paths
-            self.trains_with_paths = [t for t in self.trains if self.train_info[t]['has_valid_path']]
-            self.trains_without_paths = [t for t in self.trains if not self.train_info[t]['has_valid_path']]
+            self.trains_with_paths = [t for t in self.trains if self.train_info[t].has_valid_path]
+            self.trains_without_paths = [t for t in self.trains if not self.train_info[t].has_valid_path]
+            
+            # Path sets and section/station inverted indexes
+            self._build_indexes()
+            
+            # Required headways for every train pair sharing a section
+            self.headways = DynamicHeadwayEngine(
+                self.section_trains, self.train_section_speeds, self.train_headway,
+                self.sec_dist, self.safety_margin
+            )
             
             print(f"Data loaded successfully from {data_file}")
             print(f"Trains with valid paths: {len(self.trains_with_paths)}/{self.nb_trains}")
             print(f"Trains without valid paths (will be stopped): {self.trains_without_paths}")
             print(f"Dynamic headway parameters: Min={self.min_headway}min, Safety={self.safety_margin}")
             
+            # Earliest/latest event times within the scheduling horizon
+            self._calculate_time_windows()
+            print(f"Scheduling horizon: {self.horizon:.1f} minutes")
+            
         except FileNotFoundError:
             print(f"Error: Data file '{data_file}' not found!")
             sys.exit(1)
@@ -104,35 +235,9 @@ class EnhancedDynamicHeadwayTrainScheduler:
             print(f"Error: Invalid JSON format in '{data_file}'!")
             sys.exit(1)
     
-    def _find_train_path(self, train):
-        """Find the path using BFS to ensure shortest valid path."""
-        start = self.start_station[train]
-        end = self.end_station[train]
-        
-        # BFS to find shortest path
-        queue = deque([(start, [])])
-        visited = set()
-        
-        while queue:
-            current_station, path = queue.popleft()
-            
-            if current_station == end:
-                return path
-            
-            if current_station in visited:
-                continue
-            visited.add(current_station)
-            
-            # Find all valid next sections
-            for s in self.sections:
-                if (self.allowed_sections[train][s] == 1 and 
-                    self.sec_from[s] == current_station):
-                    next_station = self.sec_to[s]
-                    if next_station not in visited:
-                        queue.append((next_station, path + [s]))
-        
-        # No valid path found
-        return []
+    def _allowed_section_set(self, train):
+        """Sections the train is allowed to use."""
+        return self.allowed_sections.section_set(train)
     
     def _calculate_train_info(self):
         """Calculate train information including paths and travel times."""
@@ -140,8 +245,17 @@ class EnhancedDynamicHeadwayTrainScheduler:
         
         print("\nFinding valid paths for trains...")
         
+        # Route every train once over the adjacency index
+        self.router = SectionRouter(self.sections, self.sec_from, self.sec_to)
+        paths = self.router.route_trains(
+            self.trains, self.start_station, self.end_station,
+            {t: self._allowed_section_set(t) for t in self.trains},
+            self.train_vmax, self.sec_dist, self.sec_vmax, self.sec_from
+        )
+        
         for t in self.trains:
-            path = self._find_train_path(t)
+            path = paths[t]
+            route_str = f"{self.station_names[self.start_station[t]]} -> {self.station_names[self.end_station[t]]}"
             
             if path:
                 # Calculate travel time for valid path
@@ -155,445 +269,856 @@ class EnhancedDynamicHeadwayTrainScheduler:
                     total_time += travel_time
                     total_distance += distance
                 
-                avg_speed = total_distance / (total_time / 60) if total_time > 0 else 0
-                
-                train_info[t] = {
-                    'path': path,
-                    'has_valid_path': True,
-                    'base_travel_time': total_time,
-                    'total_distance': total_distance,
-                    'avg_speed': avg_speed,
-                    'max_speed': self.train_vmax[t],
-                    'priority': self.train_vmax[t] / len(path) if len(path) > 0 else 0,
-                    'path_length': len(path),
-                    'headway': self.train_headway[t]
-                }
-                
-                route_str = f"{self.station_names[self.start_station[t]]} -> {self.station_names[self.end_station[t]]}"
                 print(f"   Train {t}: Valid path found - {route_str} ({len(path)} sections, {total_time:.1f} min)")
-                
             else:
                 # No valid path exists
-                train_info[t] = {
-                    'path': [],
-                    'has_valid_path': False,
-                    'base_travel_time': 0,
-                    'total_distance': 0,
-                    'avg_speed': 0,
-                    'max_speed': self.train_vmax[t],
-                    'priority': 0,
-                    'path_length': 0,
-                    'headway': self.train_headway[t]
-                }
-                
-                route_str = f"{self.station_names[self.start_station[t]]} -> {self.station_names[self.end_station[t]]}"
+                total_time = 0
+                total_distance = 0
                 print(f"   Train {t}: NO VALID PATH - {route_str}")
+            
+            train_info[t] = TrainInfo(path, total_time, total_distance, self.train_vmax[t], self.train_headway[t])
         
         return train_info
     
+    def _build_indexes(self):
+        """
+        Build lookup structures over the routed paths:
+        - path_set: train -> set of path sections
+        - section_trains: section -> trains using it (ascending train id)
+        - station_events: station -> [(train, section, 'arrival'|'departure')]
+        """
+        self.path_set = {t: set(self.train_info[t].path) for t in self.trains}
+        self.section_trains = {s: [] for s in self.sections}
+        self.station_events = {station: [] for station in self.stations}
+        
+        for t in self.trains_with_paths:
+            for s in self.train_info[t].path:
+                self.section_trains[s].append(t)
+                self.station_events[self.sec_to[s]].append((t, s, 'arrival'))
+                self.station_events[self.sec_from[s]].append((t, s, 'departure'))
+    
     def _calculate_section_speeds(self):
-        """Calculate actual speeds for each train on each section."""
+        """
+        Calculate actual speeds for each train on the sections of its path
+        (the only sections a train is ever scheduled on).
+        """
         speeds = {}
         for t in self.trains:
-            speeds[t] = {}
-            for s in self.sections:
-                # Actual speed is minimum of train max speed and section max speed
-                speeds[t][s] = min(self.train_vmax[t], self.sec_vmax[s])
+            # Actual speed is minimum of train max speed and section max speed
+            vmax = self.train_vmax[t]
+            speeds[t] = {s: min(vmax, self.sec_vmax[s]) for s in self.train_info[t].path}
         return speeds
     
-    def _calculate_dynamic_headway(self, train1, train2, section):
+    def _calculate_time_windows(self):
         """
-        Calculate dynamic headway based on relative speeds and train-specific headway values.
-        Uses the maximum headway requirement of both trains for safety.
+        Compute the scheduling horizon and earliest/latest entry and exit times.
+        The horizon is the makespan of running all trains one after another
+        in departure order (separated by the largest headway), which is always
+        feasible, so every section entry can be bounded by it minus the
+        train's remaining run.
         """
-        speed1 = self.train_section_speeds[train1][section]
-        speed2 = self.train_section_speeds[train2][section]
-        section_length = self.sec_dist[section]
+        sep = self.station_min_separation
+        self.run_time = {}
+        for t in self.trains_with_paths:
+            for s in self.train_info[t].path:
+                self.run_time[t, s] = (self.sec_dist[s] / self.train_section_speeds[t][s]) * 60
         
-        # Use maximum headway requirement from both trains
-        base_headway = max(self.train_headway[train1], self.train_headway[train2])
+        # Minimum time a train needs from first entry to completion, incl. station dwells
+        self.min_duration = {
+            t: self.train_info[t].base_travel_time + sep * (self.train_info[t].path_length - 1)
+            for t in self.trains_with_paths
+        }
+        self.train_gap = max([sep] + [self.train_headway[t] for t in self.trains_with_paths])
+        # Largest separation any pair of events can need (a dynamic headway is
+        # at most the larger train headway or the leading train's clearing time)
+        self.max_separation = max([self.train_gap] +
+                                  [c for times in self.headways.clear_time.values() for c in times])
+        self.horizon = self._serial_makespan(self.trains_with_paths)
+        self.base_tin_window, self.base_tout_window = self._time_windows(self.trains_with_paths, self.horizon)
+    
+    def _earliest_entries(self, t, release=None):
+        """Earliest entry time of every section on a train's path, honouring (train, section) release times."""
+        release = release or {}
+        earliest = float(self.earliest_departure[t])
+        entries = []
+        for s in self.train_info[t].path:
+            earliest = max(earliest, release.get((t, s), earliest))
+            entries.append(earliest)
+            earliest += self.run_time[t, s] + self.station_min_separation
+        return entries
+    
+    def _serial_makespan(self, trains, after=None, release=None, pinned=()):
+        """
+        Completion time of the last train when the given trains run one after
+        another in order of earliest start, starting no earlier than `after` + gap.
+        Only the unpinned part of each path (pinned sections form a prefix) is run.
+        """
+        sep = self.station_min_separation
+        jobs = []
+        for t in trains:
+            path = self.train_info[t].path
+            k = sum(1 for s in path if (t, s) in pinned)
+            if k < len(path):
+                duration = sum(self.run_time[t, s] for s in path[k:]) + sep * (len(path) - k - 1)
+                jobs.append((self._earliest_entries(t, release)[k], t, duration))
         
-        if speed1 >= speed2:
-            # Train ahead is faster or same speed - safe with base headway
-            return base_headway
-        else:
-            # Train ahead is slower - need larger separation
-            # Time for train1 to clear the section
-            train1_clear_time = (section_length / speed1) * 60  # minutes
-            
-            # Relative speed (train2 catching up to train1)
-            relative_speed = speed2 - speed1  # km/h
-            
-            # Time it would take train2 to catch train1 if they started together
-            catch_up_time = (section_length / relative_speed) * 60 if relative_speed > 0 else self.BIG_M
-            
-            # Safe headway: ensure train2 enters after train1 has enough lead
-            # We want train1 to clear before train2 catches up
-            safe_headway = max(
-                base_headway,
-                train1_clear_time * self.safety_margin / (speed2 / speed1)
-            )
-            
-            return min(safe_headway, train1_clear_time)
+        makespan = after
+        for start, t, duration in sorted(jobs):
+            if makespan is not None:
+                start = max(start, makespan + self.train_gap)
+            makespan = start + duration
+        return makespan or 0.0
+    
+    def _time_windows(self, trains, horizon, release=None):
+        """(earliest, latest) entry and exit windows of the given trains within horizon."""
+        sep = self.station_min_separation
+        tin_window = {}
+        tout_window = {}
+        for t in trains:
+            remaining = self.min_duration[t]
+            for s, earliest in zip(self.train_info[t].path, self._earliest_entries(t, release)):
+                run = self.run_time[t, s]
+                latest = horizon - remaining
+                tin_window[t, s] = (earliest, latest)
+                tout_window[t, s] = (earliest + run, latest + run)
+                remaining -= run + sep
+        return tin_window, tout_window
     
-    def create_model(self):
-        """Create the optimization model with dynamic headway constraints."""
+    def _big_m(self, first_window, second_window, separation):
+        """
+        Smallest M that switches off `second >= first + separation - M`
+        for all times inside the two (earliest, latest) windows.
+        """
+        return max(first_window[1] + separation - second_window[0], 0.0)
+    
+    def _calculate_dynamic_headway(self, train1, train2, section):
+        """
+        Required headway when train1 enters the section before train2.
+        Looked up from the precomputed dynamic headway engine.
+        """
+        return self.headways.headway(train1, train2, section)
+    
+    def create_model(self, trains=None, fixed=None, pinned=None, release=None):
+        """
+        Create the optimization model with dynamic headway constraints.
+        trains/fixed/pinned/release restrict the model to a subset of trains,
+        with already-decided times as boundary conditions (see _set_scope).
+        """
         print("\n" + "="*60)
         print("CREATING ENHANCED DYNAMIC HEADWAY OPTIMIZATION MODEL")
         print("="*60)
         
-        self.model = LpProblem("Enhanced_Dynamic_Headway_Train_Scheduling", LpMinimize)
-        
-        # Create decision variables
-        self._create_variables()
+        self._set_scope(trains, fixed, pinned, release)
+        if trains is not None:
+            print(f"Optimising {len(self.active_trains)} trains with {len(self.fixed_trains)} fixed trains")
         
-        # Set objective function
-        self._set_objective()
+        # Only full models are compiled; scoped models differ from run to run
+        key = skeleton = None
+        if self.model_cache is not None and trains is None and fixed is None and not pinned and not release:
+            key = topology_key(self)
+            skeleton = self.model_cache.get(key)
         
-        # Add constraints
-        self._add_constraints()
+        start = time.perf_counter()
+        if skeleton is not None:
+            try:
+                self._build_model(skeleton)
+            except SkeletonMismatch as e:
+                print(f"Compiled model does not match ({e}), building from scratch")
+                skeleton = None
+            else:
+                print(f"Updated compiled model in {time.perf_counter() - start:.2f} s")
+        if skeleton is None:
+            self._build_model()
+            if key is not None:
+                self.model_cache.put(key, ModelSkeleton(self.model))
         
         print("Model creation completed with dynamic headway logic")
     
+    def _build_model(self, skeleton=None):
+        """Build the model for the current scope, from scratch or by updating a skeleton."""
+        self._reset_variables()
+        self._skeleton = skeleton
+        try:
+            if skeleton is not None:
+                self.model = skeleton.begin()
+            else:
+                self.model = LpProblem("Enhanced_Dynamic_Headway_Train_Scheduling", LpMinimize)
+            
+            # Create decision variables
+            self._create_variables()
+            
+            # Set objective function
+            self._set_objective()
+            
+            # Add constraints
+            self._add_constraints()
+            
+            if skeleton is not None:
+                skeleton.finish()
+        finally:
+            self._skeleton = None
+    
+    def _variable(self, name, low=None, up=None, cat='Continuous'):
+        """New model variable (or the skeleton's variable of that name) with the given bounds."""
+        if self._skeleton is not None:
+            return self._skeleton.variable(name, low, up)
+        var = LpVariable(name, cat=cat)
+        # Set after construction: LpVariable resets the bounds of binaries to 0/1
+        var.lowBound = low
+        var.upBound = up
+        return var
+    
+    def _add_row(self, name, terms, rhs, sense=LpConstraintGE):
+        """
+        Add the row sum(coef * var for var, coef in terms) >= rhs (or == rhs).
+        Terms with a zero coefficient are kept so that the row structure
+        does not depend on the data.
+        """
+        if self._skeleton is not None:
+            self._skeleton.row(name, terms, sense, rhs)
+        else:
+            self.model.addConstraint(LpConstraint(LpAffineExpression(terms), sense, name, rhs))
+    
     def _create_variables(self):
         """Create decision variables."""
-        print("Creating decision variables...")
+        print(f"Creating decision variables ({'sparse' if self.sparse else 'dense'} mode)...")
         
-        # Binary: 1 if train t uses section s
-        for t in self.trains:
-            for s in self.sections:
-                self.selected[t, s] = LpVariable(f"selected_{t}_{s}", cat='Binary')
+        self._create_schedule_variables()
         
-        # Binary: 1 if train t is stopped
-        for t in self.trains:
-            self.train_stopped[t] = LpVariable(f"stopped_{t}", cat='Binary')
+        # Binary: ordering variables on sections
+        for s in self.sections:
+            section_trains = self.section_trains[s] if self.sparse else self.model_trains
+            for i, t1 in enumerate(section_trains):
+                for t2 in section_trains[i+1:]:
+                    if not self._section_pair_needed(t1, t2, s):
+                        continue
+                    self.order_on_section[t1, t2, s] = self._variable(
+                        f"order_{t1}_{t2}_{s}", 0, 1, cat='Binary'
+                    )
         
-        # Continuous: entrance and exit times
-        for t in self.trains:
-            for s in self.sections:
-                self.tin[t, s] = LpVariable(f"tin_{t}_{s}", lowBound=0)
-                self.tout[t, s] = LpVariable(f"tout_{t}_{s}", lowBound=0)
+        print(f"Variables: {len(self.selected)} selected, {len(self.tin)} tin/tout, "
+              f"{len(self.order_on_section)} order")
+    
+    def _create_schedule_variables(self):
+        """Create the per-train schedule variables (selection, stop flag, times, completion)."""
+        # (train, section) pairs that get variables: path sections only in sparse mode
+        if self.sparse:
+            train_sections = [(t, s) for t in self.model_trains
+                              for s in self.train_info[t].path]
+        else:
+            train_sections = [(t, s) for t in self.model_trains for s in self.sections]
         
-        # Continuous: completion time for each train
-        for t in self.trains:
-            self.completion_time[t] = LpVariable(f"completion_{t}", lowBound=0)
+        # Trains known to run: fixed trains and trains with an already-run path prefix
+        running = self.fixed_trains | {t for t, s in self.pinned}
         
-        # Binary: ordering variables on sections
-        for s in self.sections:
-            for t1 in self.trains:
-                for t2 in self.trains:
-                    if t1 < t2:
-                        self.order_on_section[t1, t2, s] = LpVariable(
-                            f"order_{t1}_{t2}_{s}", cat='Binary'
-                        )
+        # Binary: 1 if train t uses section s (pinned to 1 on a running train's path)
+        for t, s in train_sections:
+            pinned = t in running and s in self.path_set[t]
+            self.selected[t, s] = self._variable(f"selected_{t}_{s}", 1 if pinned else 0, 1, cat='Binary')
         
-        # Continuous: safe separation time between trains
-        for s in self.sections:
-            for t1 in self.trains:
-                for t2 in self.trains:
-                    if t1 != t2:
-                        self.safe_separation_time[t1, t2, s] = LpVariable(
-                            f"safe_sep_{t1}_{t2}_{s}", lowBound=0
-                        )
+        # Binary: 1 if train t is stopped
+        for t in self.model_trains:
+            self.train_stopped[t] = self._variable(f"stopped_{t}", 0, 0 if t in running else 1, cat='Binary')
+        
+        # Continuous: entrance and exit times, bounded by the time windows on the path
+        for t, s in train_sections:
+            tin_lo, tin_hi = self.tin_window.get((t, s), (0, None))
+            tout_lo, tout_hi = self.tout_window.get((t, s), (0, None))
+            self.tin[t, s] = self._variable(f"tin_{t}_{s}", tin_lo, tin_hi)
+            self.tout[t, s] = self._variable(f"tout_{t}_{s}", tout_lo, tout_hi)
+        
+        # Continuous: completion time for each train
+        for t in self.model_trains:
+            self.completion_time[t] = self._variable(f"completion_{t}", 0)
     
     def _set_objective(self):
         """Set objective function."""
         print("Setting objective function...")
         
         # Primary: minimize total completion time
-        total_completion = lpSum(self.completion_time[t] for t in self.trains)
+        total_completion = lpSum(self.completion_time[t] for t in self.active_trains)
         
         # Secondary: penalty for stopping trains
-        stopping_penalty = lpSum(1000 * self.train_stopped[t] for t in self.trains)
+        stopping_penalty = lpSum(1000 * self.train_stopped[t] for t in self.active_trains)
         
         # Tertiary: favor faster trains going first on shared sections
         speed_priority_bonus = lpSum(
             -0.001 * self.train_vmax[t1] * self.order_on_section[t1, t2, s]
-            for s in self.sections
-            for t1 in self.trains
-            for t2 in self.trains
-            if t1 < t2 and t1 in self.trains_with_paths and t2 in self.trains_with_paths 
-            and s in self.train_info[t1]['path'] and s in self.train_info[t2]['path']
-            and self.train_vmax[t1] > self.train_vmax[t2]
+            for s, trains_using in self.section_trains.items()
+            for i, t1 in enumerate(trains_using)
+            for t2 in trains_using[i+1:]
+            if self.train_vmax[t1] > self.train_vmax[t2] and (t1, t2, s) in self.order_on_section
         )
         
-        self.model += (total_completion + stopping_penalty + speed_priority_bonus), "Minimize_Total_Time"
+        self.model.setObjective(total_completion + stopping_penalty + speed_priority_bonus)
+        self.model.objective.name = "Minimize_Total_Time"
     
     def _add_constraints(self):
         """Add constraints with dynamic headway logic."""
         print("Adding constraints with dynamic headway logic...")
         
+        # Per-train rows only for the optimised trains (fixed trains are pinned)
+        trains_with_paths = [t for t in self.trains_with_paths if t in self.active_trains]
+        trains_without_paths = [t for t in self.trains_without_paths if t in self.active_trains]
+        
         # CRITICAL: Force trains without valid paths to be stopped
-        for t in self.trains_without_paths:
-            self.model += self.train_stopped[t] == 1, f"Force_stop_no_path_{t}"
+        for t in trains_without_paths:
+            self._add_row(f"Force_stop_no_path_{t}", [(self.train_stopped[t], 1)], 1, LpConstraintEQ)
         
         # For trains WITH valid paths, enforce they use ONLY their valid path sections
-        for t in self.trains_with_paths:
-            valid_path = self.train_info[t]['path']
+        for t in trains_with_paths:
+            valid_path = self.train_info[t].path
+            valid_sections = self.path_set[t]
             
             # Train must use ALL sections in its valid path (if not stopped)
             for s in valid_path:
-                self.model += (
-                    self.selected[t, s] >= (1 - self.train_stopped[t]),
-                    f"Must_use_path_section_{t}_{s}"
+                self._add_row(
+                    f"Must_use_path_section_{t}_{s}",
+                    [(self.selected[t, s], 1), (self.train_stopped[t], 1)], 1
                 )
             
             # Train CANNOT use sections NOT in its valid path
-            for s in self.sections:
-                if s not in valid_path:
-                    self.model += self.selected[t, s] == 0, f"Cannot_use_non_path_{t}_{s}"
+            # (sparse mode never creates those variables)
+            if not self.sparse:
+                for s in self.sections:
+                    if s not in valid_sections:
+                        self._add_row(f"Cannot_use_non_path_{t}_{s}", [(self.selected[t, s], 1)], 0, LpConstraintEQ)
         
         # For trains without paths, they cannot use any sections
-        for t in self.trains_without_paths:
-            for s in self.sections:
-                self.model += self.selected[t, s] == 0, f"No_sections_for_stopped_{t}_{s}"
+        if not self.sparse:
+            for t in trains_without_paths:
+                for s in self.sections:
+                    self._add_row(f"No_sections_for_stopped_{t}_{s}", [(self.selected[t, s], 1)], 0, LpConstraintEQ)
         
         # Travel time constraints using actual section speeds
-        for t in self.trains_with_paths:
-            for s in self.train_info[t]['path']:
-                travel_time = (self.sec_dist[s] / self.train_section_speeds[t][s]) * 60
-                self.model += (
-                    self.tout[t, s] >= self.tin[t, s] + travel_time * self.selected[t, s],
-                    f"Travel_{t}_{s}"
+        for t in trains_with_paths:
+            for s in self.train_info[t].path:
+                travel_time = self.run_time[t, s]
+                self._add_row(
+                    f"Travel_{t}_{s}",
+                    [(self.tout[t, s], 1), (self.tin[t, s], -1), (self.selected[t, s], -travel_time)], 0
                 )
         
         # Continuity constraints for valid paths
-        for t in self.trains_with_paths:
-            path = self.train_info[t]['path']
+        for t in trains_with_paths:
+            path = self.train_info[t].path
             for i in range(len(path) - 1):
                 curr_section = path[i]
                 next_section = path[i + 1]
-                self.model += (
-                    self.tin[t, next_section] >= self.tout[t, curr_section],
-                    f"Continuity_{t}_{curr_section}_{next_section}"
+                self._add_row(
+                    f"Continuity_{t}_{curr_section}_{next_section}",
+                    [(self.tin[t, next_section], 1), (self.tout[t, curr_section], -1)], 0
                 )
         
-        # Start time for first section
-        for t in self.trains_with_paths:
-            if self.train_info[t]['path']:
-                first_section = self.train_info[t]['path'][0]
-                self.model += self.tin[t, first_section] >= 0, f"Start_time_{t}"
+        # Start time for first section (not before the train's earliest departure)
+        for t in trains_with_paths:
+            if self.train_info[t].path:
+                first_section = self.train_info[t].path[0]
+                self._add_row(f"Start_time_{t}", [(self.tin[t, first_section], 1)], self.earliest_departure[t])
         
         # Completion time calculation
-        for t in self.trains_with_paths:
-            if self.train_info[t]['path']:
-                last_section = self.train_info[t]['path'][-1]
-                self.model += (
-                    self.completion_time[t] == self.tout[t, last_section],
-                    f"Completion_{t}"
+        for t in trains_with_paths:
+            if self.train_info[t].path:
+                last_section = self.train_info[t].path[-1]
+                self._add_row(
+                    f"Completion_{t}",
+                    [(self.completion_time[t], 1), (self.tout[t, last_section], -1)], 0, LpConstraintEQ
                 )
         
-        for t in self.trains_without_paths:
-            self.model += self.completion_time[t] == 0, f"No_completion_stopped_{t}"
+        for t in trains_without_paths:
+            self._add_row(f"No_completion_stopped_{t}", [(self.completion_time[t], 1)], 0, LpConstraintEQ)
+        
+        # Fixed trains: completion pinned to their scheduled exit from the last section
+        for t in self.fixed_trains:
+            last_section = self.train_info[t].path[-1]
+            self._add_row(
+                f"Fixed_completion_{t}", [(self.completion_time[t], 1)],
+                self.fixed_schedule['tout'][t, last_section], LpConstraintEQ
+            )
         
         # DYNAMIC HEADWAY CONSTRAINTS for each section
-        for s in self.sections:
-            trains_using = [t for t in self.trains_with_paths 
-                          if s in self.train_info[t]['path']]
+        # (pairs whose entry windows cannot conflict have no order variable)
+        for s, trains_using in self.headways.section_trains.items():
+            required = self.headways.required[s]
             
             for i, t1 in enumerate(trains_using):
-                for t2 in trains_using[i+1:]:
-                    # Calculate dynamic headways for both orderings
-                    headway_t1_first = self._calculate_dynamic_headway(t1, t2, s)
-                    headway_t2_first = self._calculate_dynamic_headway(t2, t1, s)
+                window1 = self.tin_window[t1, s]
+                for j in range(i + 1, len(trains_using)):
+                    t2 = trains_using[j]
+                    if (t1, t2, s) not in self.order_on_section:
+                        continue
+                    window2 = self.tin_window[t2, s]
+                    # Precomputed dynamic headways for both orderings
+                    headway_t1_first = required[i][j]
+                    headway_t2_first = required[j][i]
                     
-                    # Set safe separation times based on who goes first
-                    self.model += self.safe_separation_time[t1, t2, s] >= headway_t1_first
-                    self.model += self.safe_separation_time[t2, t1, s] >= headway_t2_first
+                    tin1 = self.tin[t1, s]
+                    tin2 = self.tin[t2, s]
+                    order = self.order_on_section[min(t1,t2), max(t1,t2), s]
                     
                     # Ordering constraints with dynamic headway
-                    # If t1 goes first (order = 1)
-                    self.model += (
-                        self.tin[t2, s] >= self.tin[t1, s] + self.safe_separation_time[t1, t2, s] 
-                        - self.BIG_M * (1 - self.order_on_section[min(t1,t2), max(t1,t2), s]),
-                        f"Dynamic_order1_{s}_{t1}_{t2}"
+                    # If t1 goes first (order = 1):
+                    #   tin2 >= tin1 + headway - M * (1 - order)
+                    big_m = self._big_m(window1, window2, headway_t1_first)
+                    self._add_row(
+                        f"Dynamic_order1_{s}_{t1}_{t2}",
+                        [(tin2, 1), (tin1, -1), (order, -big_m)], headway_t1_first - big_m
                     )
                     
-                    # If t2 goes first (order = 0)
-                    self.model += (
-                        self.tin[t1, s] >= self.tin[t2, s] + self.safe_separation_time[t2, t1, s]
-                        - self.BIG_M * self.order_on_section[min(t1,t2), max(t1,t2), s],
-                        f"Dynamic_order2_{s}_{t1}_{t2}"
+                    # If t2 goes first (order = 0):
+                    #   tin1 >= tin2 + headway - M * order
+                    big_m = self._big_m(window2, window1, headway_t2_first)
+                    self._add_row(
+                        f"Dynamic_order2_{s}_{t1}_{t2}",
+                        [(tin1, 1), (tin2, -1), (order, big_m)], headway_t2_first
                     )
                     
                     # Additional safety: ensure faster train can overtake if needed
                     if self.train_section_speeds[t1][s] > self.train_section_speeds[t2][s]:
                         # If slower train (t2) enters first, ensure enough gap for faster train
-                        clear_time = (self.sec_dist[s] / self.train_section_speeds[t2][s]) * 60
-                        self.model += (
-                            self.tin[t1, s] >= self.tin[t2, s] + clear_time * 0.8
-                            - self.BIG_M * self.order_on_section[min(t1,t2), max(t1,t2), s],
-                            f"Overtake_safety_{s}_{t1}_{t2}"
+                        overtake_gap = self._overtake_gap(t1, t2, s)
+                        big_m = self._big_m(window2, window1, overtake_gap)
+                        self._add_row(
+                            f"Overtake_safety_{s}_{t1}_{t2}",
+                            [(tin1, 1), (tin2, -1), (order, big_m)], overtake_gap
                         )
         
-        # Bound unused variables
-        for t in self.trains:
-            for s in self.sections:
-                if t in self.trains_without_paths or (t in self.trains_with_paths and s not in self.train_info[t]['path']):
-                    self.model += self.tin[t, s] == 0, f"Zero_tin_{t}_{s}"
-                    self.model += self.tout[t, s] == 0, f"Zero_tout_{t}_{s}"
+        # Bound unused variables (only present in dense mode)
+        if not self.sparse:
+            for t in self.active_trains:
+                for s in self.sections:
+                    if s not in self.path_set[t]:
+                        self._add_row(f"Zero_tin_{t}_{s}", [(self.tin[t, s], 1)], 0, LpConstraintEQ)
+                        self._add_row(f"Zero_tout_{t}_{s}", [(self.tout[t, s], 1)], 0, LpConstraintEQ)
                     
         # STATION COLLISION PREVENTION
-        station_min_separation = 2.0  # Minimum 2 minutes between station events
+        self._add_station_constraints()
+    
+    def _add_station_constraints(self):
+        """
+        Keep station events (arrivals/departures) at least station_min_separation apart.
+        Event pairs are pruned using the time windows: a train's own arrival and
+        departure at a station have a known order, pairs whose windows are far
+        enough apart are dropped, and pairs whose windows cannot swap get a
+        single fixed-order row. Only the remaining pairs need a binary.
+        """
+        station_min_separation = self.station_min_separation
+        disjunctive = fixed = dropped = 0
         
         for station_id in self.stations:
-            # Find all trains that pass through this station
-            trains_at_station = []
-            for t in self.trains_with_paths:
-                path = self.train_info[t]['path']
-                for s in path:
-                    if self.sec_to[s] == station_id:  # Train arrives at this station
-                        trains_at_station.append((t, s, 'arrival'))
-                    if self.sec_from[s] == station_id:  # Train departs from this station  
-                        trains_at_station.append((t, s, 'departure'))
+            # Arrival events use the section exit time, departures the entry time
+            trains_at_station = [
+                (t, s, event, self.tout[t, s], self.tout_window[t, s]) if event == 'arrival'
+                else (t, s, event, self.tin[t, s], self.tin_window[t, s])
+                for t, s, event in self.station_events[station_id]
+                if t in self.active_trains or t in self.fixed_trains
+            ]
             
-            # Add separation constraints between all pairs of events at this station
-            for i, (t1, s1, event1) in enumerate(trains_at_station):
-                for j, (t2, s2, event2) in enumerate(trains_at_station):
-                    if i < j:  # Avoid duplicate constraints
-                        # Create unique constraint names using event indices
-                        constraint_id = f"{station_id}_{i}_{j}"
-                        
+            # Add separation constraints between pairs of events at this station
+            for i, (t1, s1, event1, time1, window1) in enumerate(trains_at_station):
+                for j in range(i + 1, len(trains_at_station)):
+                    t2, s2, event2, time2, window2 = trains_at_station[j]
+                    # Create unique constraint names using event indices
+                    constraint_id = f"{station_id}_{i}_{j}"
+                    
+                    if not self._in_scope(t1, t2, s1, s2):
+                        # Both events fixed: already consistent
+                        continue
+                    elif t1 == t2:
+                        # Same train: arrival always precedes its own departure (station dwell)
+                        arrival, departure = (time1, time2) if event1 == 'arrival' else (time2, time1)
+                        self._add_row(
+                            f"Station_dwell_{constraint_id}",
+                            [(departure, 1), (arrival, -1)], station_min_separation
+                        )
+                        fixed += 1
+                    elif (window2[0] >= window1[1] + station_min_separation or
+                          window1[0] >= window2[1] + station_min_separation):
+                        # Windows are always far enough apart
+                        dropped += 1
+                    elif window2[0] >= window1[1]:
+                        # Event 1 can only come first
+                        self._add_row(f"Station_fixed_{constraint_id}", [(time2, 1), (time1, -1)], station_min_separation)
+                        fixed += 1
+                    elif window1[0] >= window2[1]:
+                        # Event 2 can only come first
+                        self._add_row(f"Station_fixed_{constraint_id}", [(time1, 1), (time2, -1)], station_min_separation)
+                        fixed += 1
+                    else:
                         # Create binary variable for ordering at station
-                        station_order_var = LpVariable(f"station_order_{constraint_id}", cat='Binary')
-                        
-                        # Get event times based on arrival/departure
-                        if event1 == 'arrival':
-                            time1 = self.tout[t1, s1]
-                        else:  # departure
-                            time1 = self.tin[t1, s1]
-                            
-                        if event2 == 'arrival':
-                            time2 = self.tout[t2, s2]
-                        else:  # departure
-                            time2 = self.tin[t2, s2]
+                        station_order_var = self._variable(f"station_order_{constraint_id}", 0, 1, cat='Binary')
+                        self.station_order[constraint_id] = (station_order_var, time1, time2)
                         
                         # Ensure minimum separation: either t1 then t2, or t2 then t1
-                        self.model += (
-                            time2 >= time1 + station_min_separation 
-                            - self.BIG_M * (1 - station_order_var),
-                            f"Station_sep1_{constraint_id}"
+                        big_m = self._big_m(window1, window2, station_min_separation)
+                        self._add_row(
+                            f"Station_sep1_{constraint_id}",
+                            [(time2, 1), (time1, -1), (station_order_var, -big_m)],
+                            station_min_separation - big_m
                         )
-                        self.model += (
-                            time1 >= time2 + station_min_separation 
-                            - self.BIG_M * station_order_var,
-                            f"Station_sep2_{constraint_id}"
+                        big_m = self._big_m(window2, window1, station_min_separation)
+                        self._add_row(
+                            f"Station_sep2_{constraint_id}",
+                            [(time1, 1), (time2, -1), (station_order_var, big_m)],
+                            station_min_separation
                         )
+                        disjunctive += 1
+        
+        print(f"Station event pairs: {disjunctive} disjunctive, {fixed} fixed order, {dropped} dropped")
+    
+    def greedy_schedule(self, within_windows=True):
+        """
+        Build a feasible schedule with the greedy dispatchers (best of all strategies).
+        With within_windows=True the schedule must also fit the MIP time windows.
+        """
+        start = time.perf_counter()
+        dispatcher = GreedyDispatcher(self)
+        schedule = dispatcher.best_schedule(within_windows=within_windows)
+        elapsed = (time.perf_counter() - start) * 1000
+        
+        if schedule is None:
+            print(f"Greedy dispatch: no schedule within the scheduling horizon ({elapsed:.1f} ms)")
+            return None
+        print(f"Greedy dispatch: {len(dispatcher.dispatch_order())} trains in {elapsed:.1f} ms, "
+              f"total completion {dispatcher.total_completion(schedule):.2f} minutes")
+        return schedule
+    
+    def _load_schedule(self, schedule):
+        """
+        Set every model variable to the values implied by a schedule
+        ({'tin', 'tout', 'stopped'} dicts keyed like the variables).
+        """
+        for t in self.train_stopped:
+            stopped = schedule['stopped'].get(t, 1)
+            self.train_stopped[t].setInitialValue(stopped)
+            path = self.train_info[t].path
+            completion = schedule['tout'][t, path[-1]] if path and not stopped else 0
+            self.completion_time[t].setInitialValue(completion)
+        
+        for key in self.tin:
+            on_path = key in schedule['tin']
+            self.selected[key].setInitialValue(1 if on_path else 0)
+            self.tin[key].setInitialValue(schedule['tin'][key] if on_path else 0)
+            self.tout[key].setInitialValue(schedule['tout'][key] if on_path else 0)
+        
+        # Ordering binaries follow from the entry/event times
+        for (t1, t2, s), order_var in self.order_on_section.items():
+            tin1 = schedule['tin'].get((t1, s))
+            tin2 = schedule['tin'].get((t2, s))
+            order_var.setInitialValue(1 if tin1 is not None and tin2 is not None and tin1 <= tin2 else 0)
+        
+        for order_var, time1, time2 in self.station_order.values():
+            order_var.setInitialValue(1 if time1.varValue <= time2.varValue else 0)
+    
+    def _extract_schedule(self, trains=None):
+        """
+        Read the solved times of the given trains (default: the optimised
+        trains) back into a schedule dict. Times are clipped to the time
+        windows to absorb the rounding of the solver's solution file.
+        """
+        def clip(var, window):
+            return min(max(value(var) or 0, window[0]), window[1])
+        
+        schedule = {'tin': {}, 'tout': {}, 'stopped': {}}
+        for t in (self.active_trains if trains is None else trains):
+            stopped = 1 if (value(self.train_stopped[t]) or 0) >= 0.99 else 0
+            schedule['stopped'][t] = stopped
+            if stopped:
+                continue
+            for s in self.train_info[t].path:
+                schedule['tin'][t, s] = clip(self.tin[t, s], self.tin_window[t, s])
+                schedule['tout'][t, s] = clip(self.tout[t, s], self.tout_window[t, s])
+        return schedule
+    
+    def warm_start(self):
+        """Load the greedy schedule into the model as MIP start values."""
+        schedule = self.greedy_schedule()
+        if schedule is None:
+            return False
+        for t in self.fixed_trains:
+            schedule['stopped'][t] = 0
+            for s in self.train_info[t].path:
+                schedule['tin'][t, s] = self.fixed_schedule['tin'][t, s]
+                schedule['tout'][t, s] = self.fixed_schedule['tout'][t, s]
+        self._load_schedule(schedule)
+        return True
+    
+    def solve_heuristic(self):
+        """
+        Schedule with the greedy dispatchers only, skipping the MIP entirely.
+        The schedule is loaded into the schedule variables so that the
+        display and JSON output work unchanged.
+        """
+        print("\n" + "="*60)
+        print("HEURISTIC SCHEDULING (NO MIP)")
+        print("="*60)
+        
+        self._set_scope()
+        schedule = self.greedy_schedule(within_windows=False)
+        self._load_solution(schedule, 'heuristic', LpSolutionIntegerFeasible)
+        return LpStatusOptimal
+    
+    def _load_solution(self, schedule, method, solution_status, details=None):
+        """
+        Load a schedule for all trains built without solving the full model
+        into fresh schedule variables, so that the display and JSON output
+        work unchanged. details ({name: value}) describe how it was found
+        and are added to the output metadata.
+        """
+        self.solution_method = method
+        self.solution_status = solution_status
+        self.solution_details = dict(details or {})
+        self._set_scope()
+        # Point windows at the loaded times (which may lie outside the base
+        # windows, e.g. after a delay)
+        for key, tin in schedule['tin'].items():
+            self.tin_window[key] = (tin, tin)
+            self.tout_window[key] = (schedule['tout'][key], schedule['tout'][key])
+        self._reset_variables()
+        self._create_schedule_variables()
+        self._load_schedule(schedule)
+    
+    def solve_rolling_horizon(self, window_minutes=60, overlap_minutes=30,
+                              backend='cbc', time_limit=120, warm_start=True):
+        """
+        Solve overlapping departure-time windows one after another, each with
+        the earlier decisions fixed, and load the stitched schedule.
+        time_limit applies to each window.
+        """
+        print("\n" + "="*60)
+        print("ROLLING HORIZON OPTIMIZATION")
+        print("="*60)
+        
+        start = time.perf_counter()
+        solver = RollingHorizonSolver(self, window_minutes, overlap_minutes,
+                                      backend, time_limit, warm_start)
+        schedule, fallbacks = solver.solve()
+        
+        # Window optima are not a proven optimum for the whole problem
+        self._load_solution(schedule, 'rolling_horizon', LpSolutionIntegerFeasible,
+                            {'windows': len(solver.windows()), 'greedy_fallback_windows': fallbacks})
+        print(f"\nRolling horizon finished in {time.perf_counter() - start:.2f} s "
+              f"({fallbacks} windows fell back to greedy dispatch)")
+        return LpStatusOptimal
+    
+    def solve_decomposed(self, workers=None, backend='cbc', time_limit=120, warm_start=True):
+        """
+        Split the trains into groups that share no section or station and
+        solve each group's model in a separate process, then load the merged
+        schedule. time_limit applies to each group.
+        """
+        print("\n" + "="*60)
+        print("DECOMPOSED OPTIMIZATION (INDEPENDENT TRAIN GROUPS)")
+        print("="*60)
+        
+        start = time.perf_counter()
+        solver = DecompositionSolver(self, workers, backend, time_limit, warm_start)
+        schedule, optimal, components, fallbacks = solver.solve()
+        
+        self._load_solution(schedule, 'decomposed',
+                            LpSolutionOptimal if optimal else LpSolutionIntegerFeasible,
+                            {'components': components, 'greedy_fallback_components': fallbacks})
+        print(f"\nDecomposed solve finished in {time.perf_counter() - start:.2f} s")
+        return LpStatusOptimal
     
-    def solve(self):
-        """Solve the optimization model."""
+    def solve(self, backend='cbc', time_limit=120, warm_start=False):
+        """
+        Solve the optimization model.
+        backend is a backend name from solvers.py ('cbc' or 'highs') or a backend instance.
+        With warm_start=True the current variable values are passed as a MIP start.
+        """
         print("\n" + "="*60)
         print("SOLVING ENHANCED DYNAMIC HEADWAY OPTIMIZATION MODEL")
         print("="*60)
         
-        solver = pulp.PULP_CBC_CMD(msg=1, timeLimit=120)
-        status = self.model.solve(solver)
+        if isinstance(backend, str):
+            backend = make_backend(backend, msg=True, time_limit=time_limit, warm_start=warm_start)
+        print(f"Solver backend: {backend.name}")
+        status = backend.solve(self.model)
+        self.solution_status = self.model.sol_status
+        self.solution_details = {}
+        self.solution = None
         
         return status
     
+    def reschedule(self, previous_file, train, section, delay,
+                   backend='cbc', time_limit=120, warm_start=True):
+        """
+        Update the schedule of a previous run (its output.json) after `train`
+        was delayed by `delay` minutes at `section`, re-optimising only the
+        trains that can interact with the delayed train downstream.
+        """
+        print("\n" + "="*60)
+        print("DISRUPTION RESCHEDULING")
+        print("="*60)
+        
+        start = time.perf_counter()
+        previous = load_previous_schedule(self, previous_file)
+        rescheduler = DisruptionRescheduler(self, previous, train, section, delay,
+                                            backend, time_limit, warm_start)
+        schedule, solution_status, affected, fallback = rescheduler.solve()
+        
+        self._load_solution(schedule, 'reschedule', solution_status,
+                            {'rescheduled_trains': affected, 'greedy_fallback': fallback})
+        print(f"\nRescheduling finished in {time.perf_counter() - start:.2f} s")
+        return LpStatusOptimal
+    
+    def status_name(self, status):
+        """
+        Status of the current solution for reports: 'Heuristic' for greedy
+        dispatch, 'Feasible' when optimality is not proven, else the LpStatus name.
+        """
+        if status != LpStatusOptimal:
+            return LpStatus[status]
+        if self.solution_method == 'heuristic':
+            return "Heuristic"
+        if self.solution_status == LpSolutionIntegerFeasible:
+            return "Feasible"
+        return LpStatus[status]
+    
     def display_results(self, status):
         """Display comprehensive results."""
         print("\n" + "="*60)
         print("OPTIMIZATION RESULTS")
         print("="*60)
         
-        status_str = LpStatus[status]
-        print(f"\nStatus: {status_str}")
+        print(f"\nStatus: {self.status_name(status)}")
+        for name, detail in self.solution_details.items():
+            print(f"{name.replace('_', ' ').capitalize()}: {detail}")
         
         if status != 1:  # Not optimal
             print("\nNo optimal solution found!")
             return
         
-        print("\nOptimal solution found with dynamic headway!")
+        if self.solution_method == 'heuristic':
+            print("\nHeuristic schedule (greedy dispatch, not optimised)")
+        elif self.solution_status == LpSolutionIntegerFeasible:
+            print("\nFeasible solution found with dynamic headway (optimality not proven)")
+        else:
+            print("\nOptimal solution found with dynamic headway!")
         
         # Calculate metrics
-        running_trains = [t for t in self.trains if (value(self.train_stopped[t]) or 0) < 0.01]
-        stopped_trains = [t for t in self.trains if (value(self.train_stopped[t]) or 0) >= 0.99]
-        
-        total_completion = sum(value(self.completion_time[t]) or 0 for t in running_trains)
-        avg_completion = total_completion / len(running_trains) if running_trains else 0
+        metrics = self._performance_metrics()
         
-        total_delay = sum((value(self.completion_time[t]) or 0) - self.train_info[t]['base_travel_time'] 
-                         for t in running_trains if self.train_info[t]['has_valid_path'])
-        avg_delay = total_delay / len(running_trains) if running_trains else 0
-        
-        print(f"\nTOTAL COMPLETION TIME: {total_completion:.2f} minutes")
-        print(f"AVERAGE COMPLETION TIME: {avg_completion:.2f} minutes")
-        print(f"TOTAL DELAY: {total_delay:.2f} minutes")
-        print(f"AVERAGE DELAY: {avg_delay:.2f} minutes")
-        print(f"RUNNING TRAINS: {len(running_trains)}/{self.nb_trains}")
-        print(f"STOPPED TRAINS: {len(stopped_trains)}")
+        print(f"\nTOTAL COMPLETION TIME: {metrics['total_completion']:.2f} minutes")
+        print(f"AVERAGE COMPLETION TIME: {metrics['avg_completion']:.2f} minutes")
+        print(f"TOTAL DELAY: {metrics['total_delay']:.2f} minutes")
+        print(f"AVERAGE DELAY: {metrics['avg_delay']:.2f} minutes")
+        print(f"RUNNING TRAINS: {metrics['running']}/{self.nb_trains}")
+        print(f"STOPPED TRAINS: {metrics['stopped']}")
         
         # Display train schedules
         self._display_train_schedules()
     
+    def snapshot(self):
+        """Solution snapshot of the current solve (extracted on first use)."""
+        if self.solution is None:
+            self.solution = SolutionSnapshot.from_scheduler(self)
+        return self.solution
+    
+    def _performance_metrics(self):
+        """Completion, delay and running/stopped counts of the current solution."""
+        solution = self.snapshot()
+        running_trains = solution.running_trains()
+        total_completion = sum(solution.completion_time(t) for t in running_trains)
+        total_delay = sum(solution.completion_time(t) - self.earliest_departure[t]
+                          - self.train_info[t].base_travel_time
+                          for t in running_trains)
+        return {
+            'total_completion': total_completion,
+            'avg_completion': total_completion / len(running_trains) if running_trains else 0,
+            'total_delay': total_delay,
+            'avg_delay': total_delay / len(running_trains) if running_trains else 0,
+            'running': len(running_trains),
+            'stopped': self.nb_trains - len(running_trains),
+        }
+    
     def _display_train_schedules(self):
         """Display train schedules for running trains."""
         print("\nTRAIN SCHEDULES")
         print("-" * 60)
         
-        running_trains = [t for t in self.trains if (value(self.train_stopped[t]) or 0) < 0.01]
+        solution = self.snapshot()
         
-        for t in sorted(running_trains):
-            if self.train_info[t]['has_valid_path']:
-                completion = value(self.completion_time[t]) or 0
-                base_time = self.train_info[t]['base_travel_time']
-                delay = completion - base_time
-                headway = self.train_info[t]['headway']
+        for t in sorted(solution.running_trains()):
+            if self.train_info[t].has_valid_path:
+                completion = solution.completion_time(t)
+                base_time = self.train_info[t].base_travel_time
+                delay = completion - self.earliest_departure[t] - base_time
+                headway = self.train_info[t].headway
                 
                 print(f"\nTrain {t}: {self.station_names[self.start_station[t]]} -> {self.station_names[self.end_station[t]]}")
                 print(f"Max Speed: {self.train_vmax[t]} km/h | Headway: {headway} min | Completion: {completion:.2f} min | Delay: {delay:+.1f} min")
                 
-                path = self.train_info[t]['path']
-                for s in path:
-                    tin_val = value(self.tin[t, s]) or 0
-                    tout_val = value(self.tout[t, s]) or 0
+                sections, tins, touts = solution.train_schedule(t)
+                for s, tin_val, tout_val in zip(sections.tolist(), tins.tolist(), touts.tolist()):
                     speed = self.train_section_speeds[t][s]
                     route_name = f"{self.station_names[self.sec_from[s]]} -> {self.station_names[self.sec_to[s]]}"
                     
                     print(f"   Section {s}: {route_name} | Entry: {tin_val:.2f} | Exit: {tout_val:.2f} | Speed: {speed:.0f} km/h")
     
-    def save_results_to_json(self, status, filename="output.json"):
-        """Save complete scheduling results to a single JSON file."""
-        print(f"\nSaving results to {filename}...")
+    def save_results_to_json(self, status, filename="output.json", output_data=None, stream=None, writer=None):
+        """
+        Save complete scheduling results to a single JSON file
+        (or to stream, e.g. the detached stdout, if filename is '-').
+        output_data: results from build_results (default: build them)
+        writer: output_writer.OutputWriter (default: pretty layout)
+        """
+        print(f"\nSaving results to {'stdout' if filename == '-' else filename}...")
         
-        if status != 1:
+        if output_data is None:
+            output_data = self.build_results(status)
+        if output_data is None:
             print("Cannot save results - no optimal solution found")
             return
         
-        # Calculate performance metrics
-        running_trains = [t for t in self.trains if (value(self.train_stopped[t]) or 0) < 0.01]
-        stopped_trains = [t for t in self.trains if (value(self.train_stopped[t]) or 0) >= 0.99]
+        # Save to JSON file
+        try:
+            (writer or OutputWriter()).write(output_data, [filename], stream)
+            print(f"Results saved successfully to {'stdout' if filename == '-' else filename}")
+            
+        except Exception as e:
+            print(f"Error saving results: {e}")
+    
+    def build_results(self, status, layout='records'):
+        """
+        Complete scheduling results as a JSON-serialisable dict (None without a solution).
+        layout='columns' writes the timeline and the per-section train schedules
+        as one list per field instead of one dict per entry.
+        """
+        if status != 1:
+            return None
         
-        total_completion = sum(value(self.completion_time[t]) or 0 for t in running_trains)
-        avg_completion = total_completion / len(running_trains) if running_trains else 0
-        total_delay = sum((value(self.completion_time[t]) or 0) - self.train_info[t]['base_travel_time'] 
-                         for t in running_trains)
-        avg_delay = total_delay / len(running_trains) if running_trains else 0
+        # Calculate performance metrics
+        solution = self.snapshot()
+        metrics = self._performance_metrics()
         
         # Prepare the output data structure
         output_data = {
             "metadata": {
                 "timestamp": datetime.now().isoformat(),
-                "solver_status": LpStatus[status],
+                "solver_status": self.status_name(status),
+                "solution_method": self.solution_method,
+                **self.solution_details,
                 "model_type": "Dynamic Headway Scheduling",
                 "min_headway_minutes": self.min_headway,
                 "safety_margin": self.safety_margin,
+                "scheduling_horizon_minutes": round(self.horizon, 2),
                 "total_trains": self.nb_trains,
                 "total_sections": self.nb_sections,
                 "total_stations": self.nb_stations
             },
             "performance_metrics": {
-                "total_completion_time_minutes": round(total_completion, 2),
-                "average_completion_time_minutes": round(avg_completion, 2),
-                "total_delay_minutes": round(total_delay, 2),
-                "average_delay_minutes": round(avg_delay, 2),
-                "running_trains_count": len(running_trains),
-                "stopped_trains_count": len(stopped_trains),
-                "success_rate_percent": round((len(running_trains) / self.nb_trains) * 100, 1)
+                "total_completion_time_minutes": round(metrics['total_completion'], 2),
+                "average_completion_time_minutes": round(metrics['avg_completion'], 2),
+                "total_delay_minutes": round(metrics['total_delay'], 2),
+                "average_delay_minutes": round(metrics['avg_delay'], 2),
+                "running_trains_count": metrics['running'],
+                "stopped_trains_count": metrics['stopped'],
+                "success_rate_percent": round((metrics['running'] / self.nb_trains) * 100, 1)
             },
             "stations": {
-                str(k): v for k, v in self.station_names.items()
+                str(k): self.station_names[k] for k in self.stations
             },
             "sections": {
                 str(s): {
@@ -610,10 +1135,19 @@ class EnhancedDynamicHeadwayTrainScheduler:
             "timeline_events": []
         }
         
+        if layout == 'columns':
+            output_data["metadata"]["layout"] = "columns"
+        
+        # Rounded times of all scheduled sections, sliced per train below
+        entry_all = np.round(solution.tin, 3).tolist()
+        exit_all = np.round(solution.tout, 3).tolist()
+        travel_all = np.round(solution.tout - solution.tin, 3).tolist()
+        sections_all = solution.sections.tolist()
+        
         # Process each train
         for t in self.trains:
-            stopped_val = value(self.train_stopped[t]) or 0
-            completion_val = value(self.completion_time[t]) or 0
+            stopped = solution.is_stopped(t)
+            completion_val = solution.completion_time(t)
             
             train_data = {
                 "train_id": t,
@@ -623,82 +1157,84 @@ class EnhancedDynamicHeadwayTrainScheduler:
                 "end_station_name": self.station_names[self.end_station[t]],
                 "max_speed_kmh": self.train_vmax[t],
                 "headway_minutes": self.train_headway[t],
-                "priority_score": round(self.train_info[t]['priority'], 3),
-                "base_travel_time_minutes": round(self.train_info[t]['base_travel_time'], 2),
-                "is_stopped": stopped_val >= 0.99,
-                "actual_completion_time_minutes": round(completion_val, 2) if stopped_val < 0.99 else None,
-                "delay_minutes": round(completion_val - self.train_info[t]['base_travel_time'], 2) if stopped_val < 0.99 else None,
-                "path_sections": self.train_info[t]['path'],
+                "priority_score": round(self.train_info[t].priority, 3),
+                "base_travel_time_minutes": round(self.train_info[t].base_travel_time, 2),
+                "earliest_departure_minutes": self.earliest_departure[t],
+                "is_stopped": stopped,
+                "actual_completion_time_minutes": None if stopped else round(completion_val, 2),
+                "delay_minutes": None if stopped else round(completion_val - self.earliest_departure[t] - self.train_info[t].base_travel_time, 2),
+                "path_sections": self.train_info[t].path,
                 "schedule": []
             }
             
             # Add detailed schedule for running trains
-            if stopped_val < 0.99:
-                for s in self.train_info[t]['path']:
-                    selected_val = value(self.selected[t, s]) or 0
-                    if selected_val >= 0.99:
-                        tin_val = value(self.tin[t, s]) or 0
-                        tout_val = value(self.tout[t, s]) or 0
-                        
-                        train_data["schedule"].append({
-                            "section_id": s,
-                            "from_station": self.sec_from[s],
-                            "to_station": self.sec_to[s],
-                            "from_station_name": self.station_names[self.sec_from[s]],
-                            "to_station_name": self.station_names[self.sec_to[s]],
-                            "distance_km": self.sec_dist[s],
-                            "actual_speed_kmh": self.train_section_speeds[t][s],
-                            "entry_time_minutes": round(tin_val, 3),
-                            "exit_time_minutes": round(tout_val, 3),
-                            "travel_time_minutes": round(tout_val - tin_val, 3)
-                        })
+            i = solution.position[t]
+            for k in range(solution.offsets[i], solution.offsets[i + 1]):
+                s = sections_all[k]
+                train_data["schedule"].append({
+                    "section_id": s,
+                    "from_station": self.sec_from[s],
+                    "to_station": self.sec_to[s],
+                    "from_station_name": self.station_names[self.sec_from[s]],
+                    "to_station_name": self.station_names[self.sec_to[s]],
+                    "distance_km": self.sec_dist[s],
+                    "actual_speed_kmh": self.train_section_speeds[t][s],
+                    "entry_time_minutes": entry_all[k],
+                    "exit_time_minutes": exit_all[k],
+                    "travel_time_minutes": travel_all[k]
+                })
             
             output_data["train_results"][str(t)] = train_data
         
-        # Section usage analysis
+        # Section usage analysis (scheduled sections grouped by section, by entry time)
+        groups = solution.section_groups()
+        no_rows = np.zeros(0, dtype=np.int64)
         for s in self.sections:
-            trains_using = []
-            train_schedules = []
+            rows = groups.get(s, no_rows)
+            trains = solution.section_train[rows].tolist()
+            entry_times = np.round(solution.tin[rows], 3).tolist()
+            exit_times = np.round(solution.tout[rows], 3).tolist()
+            speeds = [self.train_section_speeds[t][s] for t in trains]
+            headways = [self.train_headway[t] for t in trains]
             
-            for t in self.trains:
-                selected_val = value(self.selected[t, s]) or 0
-                stopped_val = value(self.train_stopped[t]) or 0
-                if (selected_val >= 0.99 and stopped_val < 0.01):
-                    trains_using.append(t)
-                    
-                    tin_val = value(self.tin[t, s]) or 0
-                    tout_val = value(self.tout[t, s]) or 0
-                    train_schedules.append({
-                        "train_id": t,
-                        "entry_time_minutes": round(tin_val, 3),
-                        "exit_time_minutes": round(tout_val, 3),
-                        "speed_kmh": self.train_section_speeds[t][s],
-                        "headway_minutes": self.train_headway[t]
-                    })
-            
-            # Sort by entry time and analyze headways
-            train_schedules.sort(key=lambda x: x["entry_time_minutes"])
+            if layout == 'columns':
+                train_schedules = {
+                    "train_id": trains,
+                    "entry_time_minutes": entry_times,
+                    "exit_time_minutes": exit_times,
+                    "speed_kmh": speeds,
+                    "headway_minutes": headways
+                }
+            else:
+                train_schedules = [
+                    {
+                        "train_id": trains[i],
+                        "entry_time_minutes": entry_times[i],
+                        "exit_time_minutes": exit_times[i],
+                        "speed_kmh": speeds[i],
+                        "headway_minutes": headways[i]
+                    } for i in range(len(trains))
+                ]
             
+            # Analyze headways between consecutive trains
             headway_analysis = []
-            for i in range(len(train_schedules) - 1):
-                t1_data = train_schedules[i]
-                t2_data = train_schedules[i + 1]
-                
-                actual_gap = t2_data["entry_time_minutes"] - t1_data["entry_time_minutes"]
-                required_headway = self._calculate_dynamic_headway(t1_data["train_id"], t2_data["train_id"], s)
+            for i in range(len(trains) - 1):
+                actual_gap = entry_times[i + 1] - entry_times[i]
+                required_headway = self._calculate_dynamic_headway(trains[i], trains[i + 1], s)
                 
                 headway_analysis.append({
-                    "first_train": t1_data["train_id"],
-                    "second_train": t2_data["train_id"],
+                    "first_train": trains[i],
+                    "second_train": trains[i + 1],
                     "actual_gap_minutes": round(actual_gap, 3),
                     "required_headway_minutes": round(required_headway, 3),
                     "is_safe": actual_gap >= required_headway - 0.01,
-                    "first_speed": t1_data["speed_kmh"],
-                    "second_speed": t2_data["speed_kmh"],
-                    "first_headway": t1_data["headway_minutes"],
-                    "second_headway": t2_data["headway_minutes"]
+                    "first_speed": speeds[i],
+                    "second_speed": speeds[i + 1],
+                    "first_headway": headways[i],
+                    "second_headway": headways[i + 1]
                 })
             
+            trains_using = sorted(trains)
             output_data["section_usage"][str(s)] = {
                 "section_id": s,
                 "from_station": self.sec_from[s],
@@ -712,74 +1248,213 @@ class EnhancedDynamicHeadwayTrainScheduler:
                 "headway_analysis": headway_analysis
             }
         
-        # Timeline events for simulation
-        events = []
-        for t in self.trains:
-            stopped_val = value(self.train_stopped[t]) or 0
-            if stopped_val < 0.01:
-                for s in self.sections:
-                    selected_val = value(self.selected[t, s]) or 0
-                    if selected_val >= 0.99:
-                        tin_val = value(self.tin[t, s]) or 0
-                        tout_val = value(self.tout[t, s]) or 0
-                        speed = self.train_section_speeds[t][s]
-                        
-                        # Departure event
-                        events.append({
-                            "time_minutes": round(tin_val, 3),
-                            "train_id": t,
-                            "station_id": self.sec_from[s],
-                            "station_name": self.station_names[self.sec_from[s]],
-                            "section_id": s,
-                            "event_type": "departure",
-                            "speed_kmh": speed,
-                            "headway_minutes": self.train_headway[t]
-                        })
-                        
-                        # Arrival event
-                        events.append({
-                            "time_minutes": round(tout_val, 3),
-                            "train_id": t,
-                            "station_id": self.sec_to[s],
-                            "station_name": self.station_names[self.sec_to[s]],
-                            "section_id": s,
-                            "event_type": "arrival",
-                            "speed_kmh": speed,
-                            "headway_minutes": self.train_headway[t]
-                        })
-        
-        # Sort events by time
-        events.sort(key=lambda x: x["time_minutes"])
-        output_data["timeline_events"] = events
+        # Timeline events for simulation, sorted by time
+        columns = solution.event_columns(self.network.sec_from, self.network.sec_to)
+        trains = columns['train'].tolist()
+        stations = columns['station'].tolist()
+        sections = columns['section'].tolist()
+        event_types = [EVENT_TYPES[event] for event in columns['event'].tolist()]
+        speeds = [self.train_section_speeds[t][s] for t, s in zip(trains, sections)]
+        headways = [self.train_headway[t] for t in trains]
         
-        # Save to JSON file
-        try:
-            with open(filename, 'w') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
-            print(f"Results saved successfully to {filename}")
-            
-        except Exception as e:
-            print(f"Error saving results: {e}")
+        if layout == 'columns':
+            output_data["timeline_events"] = {
+                "time_minutes": columns['time'].tolist(),
+                "train_id": trains,
+                "station_id": stations,
+                "section_id": sections,
+                "event_type": event_types,
+                "speed_kmh": speeds,
+                "headway_minutes": headways
+            }
+        else:
+            output_data["timeline_events"] = [
+                {
+                    "time_minutes": time_val,
+                    "train_id": trains[i],
+                    "station_id": stations[i],
+                    "station_name": self.station_names[stations[i]],
+                    "section_id": sections[i],
+                    "event_type": event_types[i],
+                    "speed_kmh": speeds[i],
+                    "headway_minutes": headways[i]
+                } for i, time_val in enumerate(columns['time'].tolist())
+            ]
+        
+        return output_data
+
+
+def read_input(filename):
+    """
+    Parse the input JSON from a file, or from stdin if filename is '-'.
+    The document is streamed (train_data.read_train_data), so the result
+    has allowed_sections in the compact schema.
+    """
+    if filename == '-':
+        return read_train_data(sys.stdin)
+    with open(filename, 'r', encoding='utf-8') as f:
+        return read_train_data(f)
+
+def load_network(filename):
+    """Open a binary network file, or exit with an error message."""
+    try:
+        return Network.load(filename)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot read network file '{filename}': {e}")
+        sys.exit(1)
+
+def detach_stdout():
+    """
+    Send everything written to stdout (scheduler prints, CBC output) to
+    stderr and return a private stream on the original stdout for results.
+    """
+    sys.stdout.flush()
+    fd = os.dup(1)
+    os.dup2(2, 1)
+    return os.fdopen(fd, 'w', buffering=1)
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Enhanced Dynamic Headway Train Scheduler")
+    parser.add_argument('--input', default='train_data.json',
+                        help="Input JSON file, '-' to read it from stdin (default: train_data.json)")
+    parser.add_argument('--output', default='output.json',
+                        help="Output JSON file, '-' to write it to stdout (compact) with all logging "
+                             "on stderr (default: output.json)")
+    parser.add_argument('--layout', choices=['records', 'columns'], default='records',
+                        help="records: one JSON object per timeline event and section entry (default); "
+                             "columns: one list per field (smaller and faster for large schedules)")
+    parser.add_argument('--compact', action='store_true',
+                        help="Write compact JSON without indentation (uses orjson if installed)")
+    parser.add_argument('--mode', choices=['mip', 'heuristic', 'rolling', 'decompose', 'portfolio', 'reschedule'],
+                        default='mip',
+                        help="mip: optimise with the solver; heuristic: greedy dispatch only (fast); "
+                             "rolling: optimise overlapping departure-time windows one by one; "
+                             "decompose: optimise independent train groups in parallel processes; "
+                             "portfolio: race several solver configurations in parallel processes; "
+                             "reschedule: update a previous output.json after a delay")
+    parser.add_argument('--solver', choices=sorted(SOLVER_BACKENDS), default='cbc',
+                        help="MIP solver backend (default: cbc)")
+    parser.add_argument('--time-limit', type=float, default=120,
+                        help="Solver time limit in seconds (default: 120)")
+    parser.add_argument('--no-warm-start', dest='warm_start', action='store_false',
+                        help="Do not seed the solver with the greedy dispatch schedule")
+    parser.add_argument('--window-minutes', type=float, default=60,
+                        help="Rolling mode: departure window length in minutes (default: 60)")
+    parser.add_argument('--overlap-minutes', type=float, default=30,
+                        help="Rolling mode: overlap between consecutive windows in minutes (default: 30)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Decompose/portfolio mode: number of worker processes (default: CPU count)")
+    parser.add_argument('--previous', default='output.json',
+                        help="Reschedule mode: output.json of the previous run (default: output.json)")
+    parser.add_argument('--delay-train', type=int,
+                        help="Reschedule mode: id of the delayed train")
+    parser.add_argument('--delay-section', type=int,
+                        help="Reschedule mode: section at which the train is delayed")
+    parser.add_argument('--delay-minutes', type=float,
+                        help="Reschedule mode: delay in minutes")
+    parser.add_argument('--network', default=None,
+                        help="Binary network file (see --save-network); the input then only needs the trains")
+    parser.add_argument('--save-network', default=None, metavar='FILE',
+                        help="Write the network of the input to a binary network file and exit")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Serve/store results in a content-addressed cache in this directory")
+    parser.add_argument('--cache-stats', action='store_true',
+                        help="Print the number of entries and the size of the cache in --cache-dir and exit")
+    parser.add_argument('--model-cache', default=None,
+                        help="Keep compiled model skeletons in this (trusted) directory and update them "
+                             "instead of rebuilding the model for the same network and trains")
+    args = parser.parse_args(argv)
+    if args.cache_stats and not args.cache_dir:
+        parser.error("--cache-stats requires --cache-dir")
+    if args.mode == 'reschedule' and None in (args.delay_train, args.delay_section, args.delay_minutes):
+        parser.error("--mode reschedule requires --delay-train, --delay-section and --delay-minutes")
+    return args
+
+def run_scheduler(scheduler, args):
+    """Schedule with the mode and solver options in args; returns the LpStatus code."""
+    if args.mode == 'heuristic':
+        status = scheduler.solve_heuristic()
+    elif args.mode == 'rolling':
+        status = scheduler.solve_rolling_horizon(args.window_minutes, args.overlap_minutes,
+                                                 args.solver, args.time_limit, args.warm_start)
+    elif args.mode == 'reschedule':
+        status = scheduler.reschedule(args.previous, args.delay_train, args.delay_section,
+                                      args.delay_minutes, args.solver, args.time_limit, args.warm_start)
+    elif args.mode == 'decompose':
+        status = scheduler.solve_decomposed(args.workers, args.solver, args.time_limit, args.warm_start)
+    else:
+        # Create and solve model
+        scheduler.create_model()
+        warm = args.warm_start and scheduler.warm_start()
+        backend = args.solver
+        if args.mode == 'portfolio':
+            backend = PortfolioSolver(args.solver, args.time_limit, warm, args.workers)
+        status = scheduler.solve(backend, args.time_limit, warm_start=warm)
+    return status
 
+def settings_key(args, network=None):
+    """
+    Scheduler options that affect the result, for the result cache key.
+    A binary network file enters the key by its contents, not its name.
+    """
+    settings = {k: v for k, v in vars(args).items()
+                if k not in ('input', 'output', 'compact', 'cache_dir', 'cache_stats', 'model_cache',
+                             'network', 'save_network')}
+    if network is not None:
+        settings['network'] = network.digest()
+    return settings
 
 def main():
     """Main execution function."""
+    args = parse_args()
+    
+    if args.cache_stats:
+        # Hit/miss counters only exist in the processes using the cache
+        print(json.dumps(ResultCache(args.cache_dir).disk_stats(), indent=2))
+        return
+    
+    if args.save_network:
+        Network.from_json(read_input(args.input)).save(args.save_network)
+        print(f"Network written to {args.save_network}")
+        return
+    
+    # With --output -, stdout carries only the results (one compact line)
+    result_stream = detach_stdout() if args.output == '-' else None
+    writer = OutputWriter(compact=args.compact or args.output == '-')
+    
     print("Enhanced Dynamic Headway Train Scheduling Optimization System V2")
     print("Using headway values from train data + Single output.json file")
     print("=" * 70)
     
-    # Create enhanced dynamic scheduler
-    scheduler = EnhancedDynamicHeadwayTrainScheduler('train_data.json')
+    network = load_network(args.network) if args.network else None
+    data = cache = key = None
+    # Rescheduling depends on a previous output file, so it is never cached
+    if args.cache_dir and args.mode != 'reschedule':
+        data = read_input(args.input)
+        cache = ResultCache(args.cache_dir)
+        key = cache_key(data, settings_key(args, network))
+        output_data = cache.get(key)
+        if output_data is not None:
+            print(f"Result cache hit ({key[:12]})")
+            writer.write(output_data, [args.output], result_stream)
+            print(f"Results saved successfully to {'stdout' if args.output == '-' else args.output}")
+            return
     
-    # Create and solve model
-    scheduler.create_model()
-    status = scheduler.solve()
+    # Create enhanced dynamic scheduler
+    model_cache = ModelCache(args.model_cache) if args.model_cache else None
+    scheduler = EnhancedDynamicHeadwayTrainScheduler(args.input, data=data, model_cache=model_cache,
+                                                     network=network)
+    status = run_scheduler(scheduler, args)
     
     # Display results
     scheduler.display_results(status)
     
     # Save results to single output.json file
-    scheduler.save_results_to_json(status)
+    output_data = scheduler.build_results(status, args.layout)
+    if cache is not None and output_data is not None:
+        cache.put(key, output_data)
+    scheduler.save_results_to_json(status, args.output, output_data, stream=result_stream, writer=writer)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,346 @@
+"""
+Scaling benchmark for the train schedulers.
+
+Generates synthetic instances (instance_generator.py) over a sweep of
+network sizes and train densities and runs each requested engine on
+every instance, timing the phases separately:
+
+- load:         parse the input and prepare the data (without routing)
+- routing:      find the train paths
+- create_model: build the MIP (MIP engines only)
+- solve:        solve the MIP, or run the heuristic / decomposed scheme
+- save:         build the output and write it
+
+Engines:
+- v3:<mode>[:<solver>]  V3.py in a --mode (mip, heuristic, rolling,
+                        decompose, portfolio) with a solver backend
+                        (cbc by default, highs)
+- v2                    V2.py (always CBC with its built-in 120 s limit;
+                        it reads the dense schema)
+
+Each run reports the phase times, the model size (rows, columns,
+binaries), the objective, the solver's best bound and the optimality gap
+(MIP engines), and the total completion time and running trains of the
+schedule (all engines, comparable across engines). The report is a JSON
+document. With --baseline, runs are compared with the same instance and
+engine in an earlier report; phases that got slower than --tolerance
+times the baseline (and by more than --min-seconds) and schedules whose
+total completion time got worse are listed as regressions, and the exit
+status is 1.
+
+    python benchmark.py --shape grid --sizes 3 4 5 --trains-per-hour 10 20 \\
+        --engines v3:mip v3:heuristic v2 -o results.json
+    python benchmark.py ... --baseline results.json -o new.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pulp
+from pulp import LpStatus, value
+
+import V3
+from instance_generator import add_instance_args, generate_instance, to_dense
+from output_writer import OutputWriter
+from portfolio import PortfolioSolver
+from solvers import SOLVER_BACKENDS, make_backend
+
+V3_MODES = ('mip', 'heuristic', 'rolling', 'decompose', 'portfolio')
+PHASES = ('load', 'routing', 'create_model', 'solve', 'save')
+
+
+def _timed_routing(scheduler_class):
+    """Subclass of a scheduler class that records the time spent routing trains."""
+    class TimedScheduler(scheduler_class):
+        def _calculate_train_info(self):
+            start = time.perf_counter()
+            try:
+                return super()._calculate_train_info()
+            finally:
+                self.routing_seconds = time.perf_counter() - start
+    return TimedScheduler
+
+
+TimedV3Scheduler = _timed_routing(V3.EnhancedDynamicHeadwayTrainScheduler)
+
+
+def parse_engine(text):
+    """'v3:mip:highs' -> ('v3', 'mip', 'highs'); 'v2' -> ('v2', 'mip', 'cbc')"""
+    parts = text.split(':')
+    if parts == ['v2']:
+        return 'v2', 'mip', 'cbc'
+    if parts[0] == 'v3' and len(parts) in (2, 3) and parts[1] in V3_MODES:
+        solver = parts[2] if len(parts) == 3 else 'cbc'
+        if solver in SOLVER_BACKENDS:
+            return 'v3', parts[1], solver
+    raise argparse.ArgumentTypeError(
+        f"invalid engine '{text}' (expected v2 or v3:<{'|'.join(V3_MODES)}>[:<{'|'.join(SOLVER_BACKENDS)}>])"
+    )
+
+
+@contextlib.contextmanager
+def _silenced(enabled):
+    """Discard everything written to stdout (scheduler prints, CBC output)."""
+    if not enabled:
+        yield
+        return
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+
+@contextlib.contextmanager
+def _working_directory(path):
+    """Run in path (V2.py writes its outputs to the current directory)."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _schedule_metrics(scheduler):
+    """Total completion time and running trains, from the schedule variables."""
+    running = [t for t, stopped in scheduler.train_stopped.items() if (stopped.varValue or 0) < 0.5]
+    total = sum(scheduler.completion_time[t].varValue or 0 for t in running)
+    return {'total_completion_minutes': round(total, 3), 'running_trains': len(running)}
+
+
+def _model_metrics(model, bound):
+    """Size, objective, best bound and relative gap of a solved MIP."""
+    objective = value(model.objective)
+    gap = None
+    if objective is not None and bound is not None:
+        gap = abs(objective - bound) / max(abs(objective), 1e-9)
+    return {
+        'model': {
+            'rows': len(model.constraints),
+            'cols': model.numVariables(),
+            'binaries': sum(1 for v in model.variables() if v.isBinary()),
+        },
+        'objective': objective,
+        'bound': bound,
+        'gap': gap,
+    }
+
+
+def run_v3(input_file, mode, solver, time_limit, workdir):
+    """Run V3.py on an instance file; returns (phase seconds, status name, metrics)."""
+    seconds = dict.fromkeys(PHASES)
+    start = time.perf_counter()
+    scheduler = TimedV3Scheduler(input_file, data=V3.read_input(input_file))
+    seconds['routing'] = scheduler.routing_seconds
+    seconds['load'] = time.perf_counter() - start - scheduler.routing_seconds
+
+    metrics = {}
+    if mode in ('mip', 'portfolio'):
+        start = time.perf_counter()
+        scheduler.create_model()
+        seconds['create_model'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm = scheduler.warm_start()
+        if mode == 'portfolio':
+            backend = PortfolioSolver(solver, time_limit, warm)
+        else:
+            backend = make_backend(solver, msg=False, time_limit=time_limit, warm_start=warm,
+                                   log_path=os.path.join(workdir, 'solver.log'))
+        status = scheduler.solve(backend, time_limit, warm_start=warm)
+        seconds['solve'] = time.perf_counter() - start
+        metrics = _model_metrics(scheduler.model, getattr(backend, 'bound', None))
+    else:
+        args = V3.parse_args(['--mode', mode, '--solver', solver, '--time-limit', str(time_limit)])
+        start = time.perf_counter()
+        status = V3.run_scheduler(scheduler, args)
+        seconds['solve'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    output_data = scheduler.build_results(status)
+    scheduler.save_results_to_json(status, os.path.join(workdir, 'output.json'), output_data)
+    seconds['save'] = time.perf_counter() - start
+    metrics.update(_schedule_metrics(scheduler))
+    return seconds, output_data['metadata']['solver_status'], metrics
+
+
+def run_v2(input_file, workdir):
+    """Run V2.py on a dense-schema instance file; returns (phase seconds, status name, metrics)."""
+    # Imported on demand: V2.py needs tabulate, which V3.py does not
+    import V2
+
+    seconds = dict.fromkeys(PHASES)
+    with _working_directory(workdir):
+        start = time.perf_counter()
+        scheduler = _timed_routing(V2.EnhancedDynamicHeadwayTrainScheduler)(input_file)
+        seconds['routing'] = scheduler.routing_seconds
+        seconds['load'] = time.perf_counter() - start - scheduler.routing_seconds
+
+        start = time.perf_counter()
+        scheduler.create_model()
+        seconds['create_model'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        status = scheduler.solve()
+        seconds['solve'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scheduler.save_results_to_json(status)
+        seconds['save'] = time.perf_counter() - start
+
+    metrics = _model_metrics(scheduler.model, None)
+    metrics.update(_schedule_metrics(scheduler))
+    return seconds, LpStatus[status], metrics
+
+
+def run_engine(engine, files, time_limit, workdir):
+    """One benchmark run of an engine ('v2', or ('v3', mode, solver))."""
+    name, mode, solver = engine
+    if name == 'v2':
+        return run_v2(files['dense'], workdir)
+    return run_v3(files['compact'], mode, solver, time_limit, workdir)
+
+
+def engine_name(engine):
+    name, mode, solver = engine
+    return 'v2' if name == 'v2' else f"v3:{mode}:{solver}"
+
+
+def find_regressions(results, baseline, tolerance, min_seconds):
+    """Runs that got slower or worse than the run of the same instance and engine in baseline."""
+    previous = {(r['instance']['name'], r['engine']): r for r in baseline.get('results', []) if 'error' not in r}
+    regressions = []
+    for run in results:
+        old = previous.get((run['instance']['name'], run['engine']))
+        if old is None or 'error' in run:
+            continue
+        for phase in PHASES:
+            new_s, old_s = run['seconds'][phase], old['seconds'].get(phase)
+            if new_s is not None and old_s is not None and new_s > old_s * tolerance and new_s - old_s > min_seconds:
+                regressions.append({'instance': run['instance']['name'], 'engine': run['engine'],
+                                    'phase': phase, 'baseline': old_s, 'value': new_s})
+        new_total, old_total = run['total_completion_minutes'], old.get('total_completion_minutes')
+        worse = old_total is not None and new_total > old_total * 1.001 + 1e-6
+        if worse or run['running_trains'] < old.get('running_trains', 0):
+            regressions.append({'instance': run['instance']['name'], 'engine': run['engine'],
+                                'phase': 'schedule', 'baseline': old_total, 'value': new_total})
+    return regressions
+
+
+def parse_benchmark_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the train schedulers")
+    add_instance_args(parser)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 20],
+                        help="Network sizes to sweep: stations (corridor), grid side (grid) "
+                             "or spokes (hub) (default: 5 10 20)")
+    parser.add_argument('--trains-per-hour', type=float, nargs='+', default=[6],
+                        help="Train densities to sweep (default: 6)")
+    parser.add_argument('--engines', type=parse_engine, nargs='+', default=[parse_engine('v3:mip')],
+                        help="Engines to run: v2, v3:<mode>[:<solver>] (default: v3:mip)")
+    parser.add_argument('--time-limit', type=float, default=60,
+                        help="Solver time limit per MIP in seconds (default: 60)")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="Runs per instance and engine (default: 1)")
+    parser.add_argument('--baseline', default=None,
+                        help="Earlier report to check for regressions against")
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help="Slowdown factor counted as a regression (default: 1.5)")
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help="Ignore slowdowns smaller than this (default: 0.05)")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Show the scheduler and solver output (on stderr)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="Report file, or - for stdout (default)")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_benchmark_args()
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    # The report goes to the original stdout, logs and progress to stderr
+    result_stream = V3.detach_stdout()
+    results = []
+    with tempfile.TemporaryDirectory(prefix='train-benchmark-') as workdir:
+        for size in args.sizes:
+            for trains_per_hour in args.trains_per_hour:
+                data = generate_instance(args.shape, size, trains_per_hour, args.hours, args.speed_mix,
+                                         args.headway, args.closed_fraction, args.seed)
+                instance = {
+                    'name': f"{args.shape}-{size}-{trains_per_hour:g}tph-{args.hours:g}h-s{args.seed}",
+                    'shape': args.shape, 'size': size, 'trains_per_hour': trains_per_hour,
+                    'hours': args.hours, 'seed': args.seed,
+                    'stations': data['nb_stations'], 'sections': data['nb_sections'], 'trains': data['nb_trains'],
+                }
+                files = {'compact': os.path.join(workdir, 'instance.json'),
+                         'dense': os.path.join(workdir, 'instance_dense.json')}
+                writer = OutputWriter(compact=True)
+                writer.write(data, [files['compact']])
+                if any(engine[0] == 'v2' for engine in args.engines):
+                    writer.write(to_dense(data), [files['dense']])
+
+                for engine in args.engines:
+                    for repeat in range(args.repeat):
+                        run = {'instance': instance, 'engine': engine_name(engine), 'repeat': repeat}
+                        print(f"{instance['name']} {run['engine']} #{repeat + 1} ...", file=sys.stderr, flush=True)
+                        try:
+                            with _silenced(not args.verbose):
+                                seconds, status, metrics = run_engine(engine, files, args.time_limit, workdir)
+                        except Exception as e:
+                            run['error'] = f"{type(e).__name__}: {e}"
+                            print(f"   failed: {run['error']}", file=sys.stderr)
+                        else:
+                            run['status'] = status
+                            run['seconds'] = {phase: None if s is None else round(s, 4) for phase, s in seconds.items()}
+                            run['seconds']['total'] = round(sum(s for s in seconds.values() if s is not None), 4)
+                            run.update(metrics)
+                            print(f"   {run['seconds']['total']:.2f} s, {status}, "
+                                  f"completion {run['total_completion_minutes']}", file=sys.stderr)
+                        results.append(run)
+
+    report = {
+        'metadata': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'pulp': pulp.__version__,
+            'platform': platform.platform(),
+            'parameters': {
+                'shape': args.shape, 'sizes': args.sizes, 'trains_per_hour': args.trains_per_hour,
+                'hours': args.hours, 'speed_mix': args.speed_mix, 'headway': list(args.headway),
+                'closed_fraction': args.closed_fraction, 'seed': args.seed,
+                'engines': [engine_name(engine) for engine in args.engines],
+                'time_limit': args.time_limit, 'repeat': args.repeat,
+            },
+        },
+        'results': results,
+    }
+    if baseline is not None:
+        report['regressions'] = find_regressions(results, baseline, args.tolerance, args.min_seconds)
+        for regression in report['regressions']:
+            print(f"REGRESSION {regression['instance']} {regression['engine']} {regression['phase']}: "
+                  f"{regression['baseline']} -> {regression['value']}", file=sys.stderr)
+
+    OutputWriter().write(report, [args.output], result_stream)
+    if report.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Compiled model skeletons for the train scheduler.
+
+Most of a MIP run on a large instance is spent building the PuLP model.
+Repeated runs on the same network and train set (same sections, stations,
+trains and paths) produce a model with the same variables and rows; only
+the variable bounds (time windows), a few coefficients (big-M values, run
+times) and the right-hand sides (headways, departures) change.
+
+The first full model built for such a topology is kept as a skeleton: the
+PuLP problem together with a map of its variables by name. Later builds
+write their bounds, coefficients and right-hand sides into the skeleton's
+variables and rows in place instead of creating new expressions. If a
+build does not match the skeleton (e.g. different time windows change
+which train pairs need an ordering binary), the model is built
+from scratch and replaces the skeleton.
+
+Skeletons are kept in a small in-memory LRU (useful in the long-lived
+worker) and, with a directory, pickled to disk so that a new process can
+start from a snapshot. The directory is an LRU too: the least recently
+used snapshots are removed once it exceeds its size limit.
+
+Snapshots are read with pickle, which can run arbitrary code, so the
+directory must be trusted: only the scheduler's own user may be able to
+write to it (it is created with mode 0700).
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+
+from output_writer import atomic_write
+from result_cache import evict_lru, touch
+
+# Bump when a scheduler change alters the model structure for the same topology
+SKELETON_VERSION = 2
+
+
+class SkeletonMismatch(Exception):
+    """The model being built does not have the structure of the skeleton."""
+
+
+def topology_key(scheduler):
+    """Hex digest of everything that determines the model structure."""
+    payload = json.dumps({
+        'version': SKELETON_VERSION,
+        'sparse': scheduler.sparse,
+        'sections': [[s, scheduler.sec_from[s], scheduler.sec_to[s]] for s in scheduler.sections],
+        'trains': [[t, scheduler.train_info[t].path] for t in scheduler.trains],
+    }, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ModelSkeleton:
+    def __init__(self, model, variables=None):
+        """Skeleton of a built model; variables maps names to the model's LpVariables."""
+        self.model = model
+        self.variables = variables if variables is not None else {v.name: v for v in model.variables()}
+        self._used_variables = 0
+        self._used_rows = 0
+
+    def begin(self):
+        """Start a build on the skeleton and return its (re-used) problem."""
+        self._used_variables = 0
+        self._used_rows = 0
+        self.model.objective = None
+        self.model.assignStatus(0)
+        return self.model
+
+    def variable(self, name, low, up):
+        """The skeleton's variable called name, with new bounds."""
+        try:
+            var = self.variables[name]
+        except KeyError:
+            raise SkeletonMismatch(f"no variable {name}") from None
+        var.lowBound = low
+        var.upBound = up
+        var.varValue = None
+        self._used_variables += 1
+        return var
+
+    def row(self, name, terms, sense, rhs):
+        """Write new coefficients and right-hand side into the row called name."""
+        try:
+            row = self.model._constraints[name]
+        except KeyError:
+            raise SkeletonMismatch(f"no row {name}") from None
+        expr = row.expr
+        if len(terms) != len(expr):
+            raise SkeletonMismatch(f"row {name} has different variables")
+        for var, coef in terms:
+            if var not in expr:
+                raise SkeletonMismatch(f"row {name} has different variables")
+            expr[var] = coef
+        row.sense = sense
+        row.constant = -rhs
+        row.modified = True
+        self._used_rows += 1
+
+    def finish(self):
+        """Check that the build used every variable and row of the skeleton."""
+        if self._used_variables != len(self.variables):
+            raise SkeletonMismatch(f"{len(self.variables) - self._used_variables} variables not in the new model")
+        if self._used_rows != len(self.model._constraints):
+            raise SkeletonMismatch(f"{len(self.model._constraints) - self._used_rows} rows not in the new model")
+
+
+class ModelCache:
+    def __init__(self, directory=None, memory_entries=4, disk_bytes=1024 * 1024 * 1024):
+        """
+        LRU cache of model skeletons by topology key, in memory (up to
+        memory_entries) and, if directory is given (a trusted directory,
+        see module docstring), as pickles on disk (up to disk_bytes).
+        """
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self.memory = OrderedDict()
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.model.pickle")
+
+    def _remember(self, key, skeleton):
+        self.memory[key] = skeleton
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """Skeleton for key, or None."""
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    model, variables = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                return None
+            touch(path)
+            skeleton = ModelSkeleton(model, variables)
+            self._remember(key, skeleton)
+            return skeleton
+        return None
+
+    def put(self, key, skeleton):
+        """Store a skeleton under key."""
+        self._remember(key, skeleton)
+        if not self.directory:
+            return
+
+        # Written atomically so readers never see a partial snapshot
+        payload = pickle.dumps((skeleton.model, skeleton.variables), protocol=pickle.HIGHEST_PROTOCOL)
+        atomic_write(self._path(key), payload)
+        evict_lru(self.directory, '.model.pickle', self.disk_bytes)
@@ -0,0 +1,180 @@
+"""
+Greedy priority dispatchers for the train scheduler.
+
+Build a feasible schedule in milliseconds. Every section entry is placed
+at the earliest time that respects
+- the train's own run times and station dwell,
+- the dynamic headway (and overtake gap) to every train already
+  dispatched on the section,
+- the station separation to every event already placed at the section's
+  departure and arrival stations.
+
+Two list-scheduling strategies decide which entry is placed next:
+- 'priority': trains one after another in descending priority order
+- 'event':    discrete-event simulation; section requests are served in
+              order of their ready time, ties broken by train priority
+
+Only the scheduler's active trains are dispatched; its fixed trains and
+pinned path prefixes are placed first at their already-decided times and
+block capacity.
+
+The result uses the same keys as the model variables, so it can be
+loaded as a MIP warm start or written out directly.
+"""
+
+import heapq
+from collections import defaultdict
+
+STRATEGIES = ('priority', 'event')
+
+
+class GreedyDispatcher:
+    def __init__(self, scheduler):
+        """Dispatch the trains of an EnhancedDynamicHeadwayTrainScheduler."""
+        self.scheduler = scheduler
+
+    def _gap(self, first, second, section):
+        """Minimum entry gap when `first` enters `section` before `second`."""
+        sch = self.scheduler
+        gap = sch.headways.headway(first, second, section)
+        # Overtake safety: a faster lower-id train following a slower one
+        if second < first and sch.train_section_speeds[second][section] > sch.train_section_speeds[first][section]:
+            pos = sch.headways.position[section][first]
+            gap = max(gap, sch.headways.clear_time[section][pos] * 0.8)
+        return gap
+
+    def _earliest_entry(self, ready, intervals):
+        """Earliest time >= ready outside all open (start, end) intervals."""
+        t = ready
+        for start, end in sorted(intervals):
+            if start >= t:
+                break
+            if end > t:
+                t = end
+        return t
+
+    def _place(self, t, s, ready, schedule, section_entries, station_times):
+        """Enter section s at the earliest conflict-free time >= ready; returns the exit time."""
+        sch = self.scheduler
+        sep = sch.station_min_separation
+        run = sch.run_time[t, s]
+
+        intervals = [
+            (tin_u - self._gap(t, u, s), tin_u + self._gap(u, t, s))
+            for u, tin_u in section_entries[s]
+        ]
+        intervals.extend((e - sep, e + sep) for e in station_times[sch.sec_from[s]])
+        intervals.extend((e - sep - run, e + sep - run) for e in station_times[sch.sec_to[s]])
+
+        tin = self._earliest_entry(max(ready, sch.tin_window[t, s][0]), intervals)
+        tout = tin + run
+        schedule['tin'][t, s] = tin
+        schedule['tout'][t, s] = tout
+        self._occupy(t, s, tin, tout, section_entries, station_times)
+        return tout
+
+    def _occupy(self, t, s, tin, tout, section_entries, station_times):
+        """Record a placed section run as a conflict for later placements."""
+        sch = self.scheduler
+        section_entries[s].append((t, tin))
+        station_times[sch.sec_from[s]].append(tin)
+        station_times[sch.sec_to[s]].append(tout)
+
+    def _start(self, t):
+        """First unpinned path position of a train and the time it is ready there."""
+        sch = self.scheduler
+        path = sch.train_info[t].path
+        k, ready = 0, sch.earliest_departure[t]
+        while k < len(path) and (t, path[k]) in sch.pinned:
+            ready = sch.pinned[t, path[k]][1] + sch.station_min_separation
+            k += 1
+        return k, ready
+
+    def dispatch_order(self):
+        """Active trains with paths, highest priority first (ties by train id)."""
+        sch = self.scheduler
+        trains = [t for t in sch.trains_with_paths if t in sch.active_trains]
+        return sorted(trains, key=lambda t: (-sch.train_info[t].priority, t))
+
+    def run(self, strategy='priority'):
+        """
+        Build the schedule with the given strategy.
+        Returns {'tin': {(t, s): time}, 'tout': {(t, s): time}, 'stopped': {t: 0/1}}.
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown dispatch strategy '{strategy}'")
+
+        sch = self.scheduler
+        sep = sch.station_min_separation
+        section_entries = defaultdict(list)  # section -> [(train, tin)]
+        station_times = defaultdict(list)    # station -> [event time]
+        schedule = {'tin': {}, 'tout': {}, 'stopped': {}}
+
+        for t in sch.trains_without_paths:
+            if t in sch.active_trains:
+                schedule['stopped'][t] = 1
+
+        for t in sch.fixed_trains:
+            for s in sch.train_info[t].path:
+                self._occupy(t, s, sch.fixed_schedule['tin'][t, s], sch.fixed_schedule['tout'][t, s],
+                             section_entries, station_times)
+        for (t, s), (tin, tout) in sch.pinned.items():
+            schedule['tin'][t, s] = tin
+            schedule['tout'][t, s] = tout
+            self._occupy(t, s, tin, tout, section_entries, station_times)
+
+        if strategy == 'priority':
+            for t in self.dispatch_order():
+                k, ready = self._start(t)
+                for s in sch.train_info[t].path[k:]:
+                    ready = self._place(t, s, ready, schedule, section_entries, station_times) + sep
+        else:
+            # Pending requests: (ready time, dispatch rank, train, path position)
+            rank = {t: i for i, t in enumerate(self.dispatch_order())}
+            pending = []
+            for t in rank:
+                k, ready = self._start(t)
+                if k < len(sch.train_info[t].path):
+                    pending.append((ready, rank[t], t, k))
+            heapq.heapify(pending)
+            while pending:
+                ready, r, t, k = heapq.heappop(pending)
+                path = sch.train_info[t].path
+                tout = self._place(t, path[k], ready, schedule, section_entries, station_times)
+                if k + 1 < len(path):
+                    heapq.heappush(pending, (tout + sep, r, t, k + 1))
+
+        for t in self.dispatch_order():
+            schedule['stopped'][t] = 0
+
+        return schedule
+
+    def total_completion(self, schedule):
+        """Sum of completion times of the running trains."""
+        sch = self.scheduler
+        return sum(schedule['tout'][t, sch.train_info[t].path[-1]]
+                   for t, stopped in schedule['stopped'].items() if not stopped)
+
+    def best_schedule(self, within_windows=False):
+        """
+        Run every strategy and keep the schedule with the lowest total completion time.
+        With within_windows=True only schedules inside the time windows qualify (None if none do).
+        """
+        schedules = [self.run(strategy) for strategy in STRATEGIES]
+        if within_windows:
+            schedules = [schedule for schedule in schedules if self.within_windows(schedule)]
+        return min(schedules, key=self.total_completion, default=None)
+
+    def within_windows(self, schedule):
+        """True if every entry/exit time lies inside the scheduler's time windows."""
+        sch = self.scheduler
+        tol = 1e-6
+        for key, tin in schedule['tin'].items():
+            lo, hi = sch.tin_window[key]
+            if tin < lo - tol or tin > hi + tol:
+                return False
+        for key, tout in schedule['tout'].items():
+            lo, hi = sch.tout_window[key]
+            if tout < lo - tol or tout > hi + tol:
+                return False
+        return True
@@ -0,0 +1,176 @@
+"""
+Synthetic train_data instances for benchmarks and scaling tests.
+
+Three network shapes, all double-track (one section per direction on
+every link):
+- corridor: `size` stations on a line
+- grid:     size x size stations, links to the right and downwards
+- hub:      a hub station with `size` spokes of SPOKE_LENGTH stations
+
+Trains depart uniformly at random over `hours` hours (trains_per_hour on
+average) between two random distinct stations. Their maximum speed is
+drawn from speed_mix ({km/h: weight}) and their headway uniformly from
+headway_spread (min, max minutes, in half minutes). With closed_fraction
+each train is barred from a random share of the sections (which may
+leave it without a path).
+
+Instances are produced in the compact input schema (see network.py);
+to_dense converts one to the dense schema read by V2.py. The same
+parameters and seed always give the same instance.
+
+    python instance_generator.py --shape grid --size 6 --trains-per-hour 20 --hours 2 -o data.json
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from output_writer import OutputWriter
+
+SHAPES = ('corridor', 'grid', 'hub')
+SPOKE_LENGTH = 4
+DEFAULT_SPEED_MIX = {80: 0.3, 120: 0.5, 160: 0.2}
+SECTION_SPEEDS = (100, 140, 160)
+SECTION_KM = (5, 30)
+
+
+def network_links(shape, size):
+    """Station names and undirected links (station id pairs) of a network shape."""
+    if shape == 'corridor':
+        names = [f"C{i}" for i in range(1, size + 1)]
+        links = [(i, i + 1) for i in range(1, size)]
+    elif shape == 'grid':
+        def station(row, col):
+            return row * size + col + 1
+        names = [f"G{row}-{col}" for row in range(size) for col in range(size)]
+        links = [(station(row, col), station(row, col + 1)) for row in range(size) for col in range(size - 1)]
+        links += [(station(row, col), station(row + 1, col)) for row in range(size - 1) for col in range(size)]
+    elif shape == 'hub':
+        names = ["Hub"] + [f"S{spoke}-{k}" for spoke in range(1, size + 1) for k in range(1, SPOKE_LENGTH + 1)]
+        links = []
+        for spoke in range(size):
+            first = 2 + spoke * SPOKE_LENGTH
+            links.append((1, first))
+            links += [(first + k, first + k + 1) for k in range(SPOKE_LENGTH - 1)]
+    else:
+        raise ValueError(f"Unknown network shape '{shape}' (available: {', '.join(SHAPES)})")
+    return names, links
+
+
+def generate_instance(shape='corridor', size=10, trains_per_hour=6, hours=2, speed_mix=None,
+                      headway_spread=(1.0, 3.0), closed_fraction=0.0, seed=0):
+    """Generate a train_data dict in the compact schema (see module docstring)."""
+    rng = np.random.default_rng(seed)
+    names, links = network_links(shape, size)
+    nb_stations = len(names)
+    if nb_stations < 2:
+        raise ValueError("a network needs at least two stations")
+
+    # Both directions of a link share its length and speed limit
+    link_km = rng.integers(SECTION_KM[0], SECTION_KM[1] + 1, len(links))
+    link_vmax = rng.choice(SECTION_SPEEDS, len(links))
+    sec_from, sec_to = [], []
+    for a, b in links:
+        sec_from += [a, b]
+        sec_to += [b, a]
+    nb_sections = len(sec_from)
+
+    nb_trains = max(1, round(trains_per_hour * hours))
+    speed_mix = speed_mix or DEFAULT_SPEED_MIX
+    speeds = np.array(list(speed_mix))
+    weights = np.array(list(speed_mix.values()), dtype=float)
+    departures = np.sort(rng.uniform(0, hours * 60, nb_trains))
+    origins = rng.integers(1, nb_stations + 1, nb_trains)
+    # Destination differs from the origin
+    destinations = (origins - 1 + rng.integers(1, nb_stations, nb_trains)) % nb_stations + 1
+    headways = np.round(rng.uniform(*headway_spread, nb_trains) * 2) / 2
+
+    all_sections = list(range(1, nb_sections + 1))
+    allowed = []
+    for _ in range(nb_trains):
+        if closed_fraction > 0:
+            open_sections = rng.random(nb_sections) >= closed_fraction
+            allowed.append((np.flatnonzero(open_sections) + 1).tolist())
+        else:
+            allowed.append(all_sections)
+
+    return {
+        'nb_stations': nb_stations,
+        'nb_sections': nb_sections,
+        'nb_trains': nb_trains,
+        'station_names': names,
+        'sec_from': sec_from,
+        'sec_to': sec_to,
+        'sec_dist': link_km.repeat(2).tolist(),
+        'sec_vmax': link_vmax.repeat(2).tolist(),
+        'allowed_sections': allowed,
+        'start_station': origins.tolist(),
+        'end_station': destinations.tolist(),
+        'train_vmax': rng.choice(speeds, nb_trains, p=weights / weights.sum()).tolist(),
+        'headway': headways.tolist(),
+        'earliest_departure': np.round(departures, 1).tolist(),
+    }
+
+
+def to_dense(data):
+    """Copy of a compact-schema instance in the dense schema ({"id": value} objects, 0/1 matrix)."""
+    def by_id(values):
+        return {str(i): v for i, v in enumerate(values, 1)}
+
+    dense = {key: by_id(value) if isinstance(value, list) else value for key, value in data.items()}
+    sections = range(1, data['nb_sections'] + 1)
+    dense['allowed_sections'] = {}
+    for t, row in enumerate(data['allowed_sections'], 1):
+        allowed = set(row)
+        dense['allowed_sections'][str(t)] = {str(s): int(s in allowed) for s in sections}
+    return dense
+
+
+def parse_speed_mix(text):
+    """'80:0.3,120:0.5,160:0.2' -> {80: 0.3, 120: 0.5, 160: 0.2}"""
+    try:
+        return {int(speed): float(weight) for speed, weight in
+                (item.split(':') for item in text.split(',') if item)}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid speed mix '{text}' (expected e.g. 80:0.3,120:0.7)")
+
+
+def add_instance_args(parser):
+    """Instance parameters shared with benchmark.py (everything except the size)."""
+    parser.add_argument('--shape', choices=SHAPES, default='corridor',
+                        help="Network shape (default: corridor)")
+    parser.add_argument('--hours', type=float, default=2,
+                        help="Departure period in hours (default: 2)")
+    parser.add_argument('--speed-mix', type=parse_speed_mix, default=DEFAULT_SPEED_MIX,
+                        help="Train speeds and their weights, e.g. 80:0.3,120:0.5,160:0.2")
+    parser.add_argument('--headway', type=float, nargs=2, default=(1.0, 3.0), metavar=('MIN', 'MAX'),
+                        help="Range of the per-train headways in minutes (default: 1 3)")
+    parser.add_argument('--closed-fraction', type=float, default=0.0,
+                        help="Share of the sections closed to each train (default: 0)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed (default: 0)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic train_data instance")
+    add_instance_args(parser)
+    parser.add_argument('--size', type=int, default=10,
+                        help="Stations (corridor), grid side (grid) or spokes (hub) (default: 10)")
+    parser.add_argument('--trains-per-hour', type=float, default=6,
+                        help="Average departures per hour (default: 6)")
+    parser.add_argument('--dense', action='store_true',
+                        help="Write the dense schema (as read by V2.py)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="Output file, or - for stdout (default)")
+    args = parser.parse_args()
+
+    data = generate_instance(args.shape, args.size, args.trains_per_hour, args.hours, args.speed_mix,
+                             args.headway, args.closed_fraction, args.seed)
+    if args.dense:
+        data = to_dense(data)
+    OutputWriter(compact=True).write(data, [args.output], stream=sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Compact array-backed network and timetable data for the train scheduler.
+
+Stations, sections and trains are numbered 1..n in train_data, so their
+attributes are stored as contiguous NumPy arrays indexed by id (index 0
+is unused) instead of {id: value} dicts:
+
+- Network:   station names, section endpoints, distances and speed limits
+- Timetable: per-train origin, destination, speed, headway, departure,
+             and the allowed sections as a CSR-style sparse mask
+             (AllowedSections) instead of a dense train x section matrix
+- TrainInfo: per-train routing result (__slots__ record)
+
+Both input schemas are accepted: the dense one ({id: value} objects and
+a train x section 0/1 matrix) and the compact one (lists holding the
+values of ids 1..n, and lists of allowed section ids per train).
+
+The network part (stations and sections) can also be stored as a binary
+file (Network.save / Network.load): a structured section array and a
+station name array, written one after the other in .npy format. The file
+is memory-mapped read-only, so opening it costs no parsing or copying
+and concurrent scheduler processes share its pages; the input JSON then
+only needs the train part.
+
+Vectorised stages (e.g. the solution timeline) use the arrays directly.
+Scalar lookups inside Python loops go through id-indexed lists made once
+from the arrays (see tables()): indexing a list is several times faster
+than indexing a NumPy array, and it yields plain Python numbers that
+serialise to JSON unchanged.
+"""
+
+import hashlib
+import io
+import json
+
+import numpy as np
+
+from output_writer import atomic_write
+
+
+_REQUIRED = object()
+
+
+def id_list(values, size, name='values', default=_REQUIRED, pad=0):
+    """
+    List indexed by id 1..size from an {id: value} mapping (ids may be
+    strings) or from a list of the values of ids 1..size. Index 0 holds
+    pad. Ids missing from a mapping get default; without a default they
+    raise a ValueError naming the field (name) and the id.
+    """
+    if isinstance(values, dict):
+        table = [pad] + [default] * size
+        for key, value in values.items():
+            table[int(key)] = value
+        if default is _REQUIRED:
+            missing = [i for i in range(1, size + 1) if table[i] is _REQUIRED]
+            if missing:
+                raise ValueError(f"{name}: no value for id {missing[0]}")
+        return table
+    if len(values) != size:
+        raise ValueError(f"{name}: expected {size} values, got {len(values)}")
+    return [pad, *values]
+
+
+def id_array(values, size, name='values', default=_REQUIRED):
+    """Array version of id_list."""
+    return np.array(id_list(values, size, name, default))
+
+
+def allowed_ids(row):
+    """
+    Sorted allowed section ids of one train, from a {section: 0/1} row of
+    the dense matrix or from a list of allowed section ids.
+    """
+    if isinstance(row, dict):
+        return sorted(int(s) for s, allowed in row.items() if allowed == 1)
+    return sorted({int(s) for s in row})
+
+
+def compact_train_data(data):
+    """Copy of a train_data dict with allowed_sections as lists of section ids."""
+    allowed = data['allowed_sections']
+    if isinstance(allowed, dict):
+        allowed = {t: allowed_ids(row) for t, row in allowed.items()}
+    else:
+        allowed = [allowed_ids(row) for row in allowed]
+    return {**data, 'allowed_sections': allowed}
+
+
+class AllowedSections:
+    """Allowed sections per train as CSR rows: indices[indptr[t]:indptr[t + 1]], sorted."""
+
+    __slots__ = ('indptr', 'indices')
+
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_json(cls, allowed, nb_trains):
+        """
+        Build from the allowed_sections of train_data: {train: row} or a
+        list of the rows of trains 1..n, each row a {section: 0/1} dict
+        or a list of allowed section ids.
+        """
+        rows = id_list(allowed, nb_trains, 'allowed_sections', pad=())
+        rows = [allowed_ids(row) for row in rows]
+        indptr = np.zeros(nb_trains + 2, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=indptr[1:])
+        indices = np.fromiter((s for row in rows for s in row), dtype=np.int32, count=int(indptr[-1]))
+        return cls(indptr, indices)
+
+    def sections(self, t):
+        """Allowed section ids of train t (sorted array)."""
+        return self.indices[self.indptr[t]:self.indptr[t + 1]]
+
+    def section_set(self, t):
+        return set(self.sections(t).tolist())
+
+
+class Network:
+    """Stations and sections."""
+
+    __slots__ = ('nb_stations', 'nb_sections', 'station_names', 'sec_from', 'sec_to', 'sec_dist', 'sec_vmax')
+
+    def __init__(self, nb_stations, nb_sections, station_names, sec_from, sec_to, sec_dist, sec_vmax):
+        self.nb_stations = nb_stations
+        self.nb_sections = nb_sections
+        self.station_names = station_names
+        self.sec_from = sec_from
+        self.sec_to = sec_to
+        self.sec_dist = sec_dist
+        self.sec_vmax = sec_vmax
+
+    @classmethod
+    def from_json(cls, data):
+        """Build from the network part of a train_data dict."""
+        nb_stations = data['nb_stations']
+        nb_sections = data['nb_sections']
+        return cls(
+            nb_stations, nb_sections, id_list(data['station_names'], nb_stations, 'station_names', pad=None),
+            id_array(data['sec_from'], nb_sections, 'sec_from'), id_array(data['sec_to'], nb_sections, 'sec_to'),
+            id_array(data['sec_dist'], nb_sections, 'sec_dist'), id_array(data['sec_vmax'], nb_sections, 'sec_vmax')
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """Open a binary network file (see save) memory-mapped."""
+        sections, names = _map_arrays(filename, 2)
+        if sections.dtype.names != _SECTION_FIELDS:
+            raise ValueError(f"{filename} is not a network file")
+        station_names = names.tolist()
+        station_names[0] = None
+        return cls(
+            len(names) - 1, len(sections) - 1, station_names,
+            sections['from'], sections['to'], sections['dist'], sections['vmax']
+        )
+
+    def save(self, filename):
+        """Write the network as a binary file (see module docstring)."""
+        sections = np.zeros(self.nb_sections + 1, dtype=[
+            ('from', np.int32), ('to', np.int32),
+            ('dist', self.sec_dist.dtype), ('vmax', self.sec_vmax.dtype),
+        ])
+        sections['from'] = self.sec_from
+        sections['to'] = self.sec_to
+        sections['dist'] = self.sec_dist
+        sections['vmax'] = self.sec_vmax
+        names = np.array(['' if name is None else name for name in self.station_names], dtype=str)
+
+        buffer = io.BytesIO()
+        np.save(buffer, sections, allow_pickle=False)
+        np.save(buffer, names, allow_pickle=False)
+        atomic_write(filename, buffer.getvalue())
+
+    def digest(self):
+        """Hex digest of the network contents (for result cache keys)."""
+        h = hashlib.sha256(json.dumps(self.station_names).encode('utf-8'))
+        for array in (self.sec_from.astype(np.int64), self.sec_to.astype(np.int64), self.sec_dist, self.sec_vmax):
+            h.update(str(array.dtype).encode('ascii'))
+            h.update(np.ascontiguousarray(array).tobytes())
+        return h.hexdigest()
+
+    def tables(self):
+        """id-indexed lists of the section attributes: sec_from, sec_to, sec_dist, sec_vmax."""
+        return self.sec_from.tolist(), self.sec_to.tolist(), self.sec_dist.tolist(), self.sec_vmax.tolist()
+
+
+_SECTION_FIELDS = ('from', 'to', 'dist', 'vmax')
+
+
+def _map_arrays(filename, count):
+    """Memory-map the first count .npy arrays stored one after another in filename."""
+    arrays = []
+    with open(filename, 'rb') as f:
+        for _ in range(count):
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+            array = np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape,
+                              order='F' if fortran_order else 'C')
+            arrays.append(array)
+            f.seek(offset + array.nbytes)
+    return arrays
+
+
+class Timetable:
+    """Trains: endpoints, speeds, headways, departures and allowed sections."""
+
+    __slots__ = ('nb_trains', 'start_station', 'end_station', 'train_vmax', 'headway',
+                 'earliest_departure', 'allowed')
+
+    def __init__(self, nb_trains, start_station, end_station, train_vmax, headway, earliest_departure, allowed):
+        self.nb_trains = nb_trains
+        self.start_station = start_station
+        self.end_station = end_station
+        self.train_vmax = train_vmax
+        self.headway = headway
+        self.earliest_departure = earliest_departure
+        self.allowed = allowed
+
+    @classmethod
+    def from_json(cls, data, default_headway=1.0):
+        """
+        Build from the train part of a train_data dict. headway may be
+        per-train values or a single value; it defaults to default_headway.
+        """
+        nb_trains = data['nb_trains']
+        headway = data.get('headway', default_headway)
+        if isinstance(headway, (dict, list)):
+            headway = id_array(headway, nb_trains, 'headway')
+        else:
+            headway = np.full(nb_trains + 1, headway)
+        return cls(
+            nb_trains,
+            id_array(data['start_station'], nb_trains, 'start_station'),
+            id_array(data['end_station'], nb_trains, 'end_station'),
+            id_array(data['train_vmax'], nb_trains, 'train_vmax'), headway,
+            # Trains without an earliest departure may leave at time 0
+            id_array(data.get('earliest_departure', {}), nb_trains, 'earliest_departure', default=0.0),
+            AllowedSections.from_json(data['allowed_sections'], nb_trains)
+        )
+
+    def tables(self):
+        """id-indexed lists: start_station, end_station, train_vmax, headway, earliest_departure."""
+        return (self.start_station.tolist(), self.end_station.tolist(), self.train_vmax.tolist(),
+                self.headway.tolist(), self.earliest_departure.tolist())
+
+
+class TrainInfo:
+    """Routing result of one train."""
+
+    __slots__ = ('path', 'has_valid_path', 'base_travel_time', 'total_distance', 'avg_speed',
+                 'max_speed', 'priority', 'path_length', 'headway')
+
+    def __init__(self, path, base_travel_time, total_distance, max_speed, headway):
+        self.path = path
+        self.has_valid_path = bool(path)
+        self.base_travel_time = base_travel_time
+        self.total_distance = total_distance
+        self.avg_speed = total_distance / (base_travel_time / 60) if base_travel_time > 0 else 0
+        self.max_speed = max_speed
+        self.priority = max_speed / len(path) if path else 0
+        self.path_length = len(path)
+        self.headway = headway
@@ -0,0 +1,82 @@
+"""
+JSON output writer for the scheduler results.
+
+A result dict is serialised once and the same bytes are written to every
+requested target, so several artefacts of one run cost one serialisation.
+Files are written atomically (temporary file in the target's directory,
+then os.replace), so readers never see a partially written file.
+
+Two layouts:
+- pretty:  indented by two spaces (the historical output.json layout)
+- compact: no whitespace at all, several times smaller for big schedules
+
+orjson is used when it is installed (it is much faster than the json
+module and produces the same documents); otherwise the json module.
+"""
+
+import json
+import os
+import secrets
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+def dumps(data, compact=False):
+    """Serialise data to UTF-8 JSON bytes."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if compact:
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def atomic_write(filename, payload):
+    """Write bytes to filename via a temporary file and a rename."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    # Unlike mkstemp (owner-only files), created with mode 0666 minus the
+    # umask, so the result gets the same mode as a plain open()
+    while True:
+        tmp = os.path.join(directory, f".{os.path.basename(filename)}.{secrets.token_hex(8)}.tmp")
+        try:
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        except FileExistsError:
+            continue
+        break
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, filename)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class OutputWriter:
+    def __init__(self, compact=False):
+        """Writer for the pretty (default) or compact layout."""
+        self.compact = compact
+
+    def write(self, data, targets, stream=None):
+        """
+        Serialise data once and write it to every target: a file name, or
+        '-' for stream (a binary or text stream, e.g. the detached stdout,
+        which gets the document followed by a newline). Returns the bytes.
+        """
+        payload = dumps(data, self.compact)
+        for target in targets:
+            if target == '-':
+                out = getattr(stream, 'buffer', stream)
+                stream.flush()
+                out.write(payload + b"\n")
+                out.flush()
+            else:
+                atomic_write(target, payload)
+        return payload
@@ -0,0 +1,139 @@
+"""
+Solver portfolio for the train scheduler.
+
+Several solver configurations (random seeds, cut levels, thread counts,
+warm start on/off) race on the same model, each in its own process. The
+first configuration that proves optimality (or infeasibility) wins and
+the others are stopped; otherwise the best incumbent found by the time
+limit is returned. The winning values are copied back into the model's
+variables, so the scheduler continues as after a normal solve.
+"""
+
+import os
+import queue
+import signal
+import time
+import multiprocessing
+
+from pulp import constants, value
+
+from solvers import make_backend
+
+# Configurations per backend, in launch order (only the first `size` are raced)
+PORTFOLIOS = {
+    'cbc': (
+        {'name': 'default'},
+        {'name': 'cold-start', 'warm_start': False},
+        {'name': 'seed-11', 'options': ['randomCbcSeed 11', 'randomSeed 11']},
+        {'name': 'cuts-off', 'options': ['cuts off']},
+        {'name': 'cuts-root', 'options': ['cuts root']},
+        {'name': 'seed-23', 'options': ['randomCbcSeed 23', 'randomSeed 23']},
+        {'name': 'strategy-2', 'options': ['strategy 2']},
+        {'name': 'threads-4', 'threads': 4},
+    ),
+    'highs': (
+        {'name': 'default'},
+        {'name': 'cold-start', 'warm_start': False},
+        {'name': 'seed-11', 'options': {'random_seed': 11}},
+        {'name': 'heuristics-high', 'options': {'mip_heuristic_effort': 0.3}},
+        {'name': 'presolve-off', 'options': {'presolve': 'off'}},
+        {'name': 'seed-23', 'options': {'random_seed': 23}},
+        {'name': 'threads-4', 'threads': 4},
+    ),
+}
+
+# Extra seconds past the time limit to wait for solvers to write their incumbents
+GRACE_SECONDS = 10
+
+
+def _race_config(model, config, backend, time_limit, warm_start, results):
+    """Solve one configuration in a child process and report its solution."""
+    # Own process group, so that stopping the race also stops the CBC binary
+    os.setpgid(0, 0)
+    solver = make_backend(
+        backend, msg=False, time_limit=time_limit,
+        threads=config.get('threads'), options=config.get('options'),
+        warm_start=warm_start and config.get('warm_start', True)
+    )
+    start = time.perf_counter()
+    try:
+        status = solver.solve(model)
+    except Exception as e:
+        print(f"Portfolio configuration {config['name']} failed: {e}")
+        results.put((config['name'], constants.LpStatusNotSolved, constants.LpSolutionNoSolutionFound,
+                     None, {}, time.perf_counter() - start))
+        return
+    values = {v.name: v.varValue for v in model.variables()}
+    objective = value(model.objective) if model.sol_status in (
+        constants.LpSolutionOptimal, constants.LpSolutionIntegerFeasible) else None
+    results.put((config['name'], status, model.sol_status, objective, values, time.perf_counter() - start))
+
+
+class PortfolioSolver:
+    name = 'portfolio'
+
+    def __init__(self, backend='cbc', time_limit=120, warm_start=True, size=None):
+        """Race up to `size` configurations of a backend (default: one per CPU)."""
+        if backend not in PORTFOLIOS:
+            raise ValueError(f"No portfolio for solver backend '{backend}'")
+        configs = PORTFOLIOS[backend]
+        self.backend = backend
+        self.time_limit = time_limit
+        self.warm_start = warm_start
+        self.configs = configs[:max(1, min(size or os.cpu_count() or 1, len(configs)))]
+
+    def solve(self, model):
+        """Race the configurations on a PuLP model and return the winner's LpStatus code."""
+        ctx = multiprocessing.get_context('fork')
+        results = ctx.Queue()
+        processes = [
+            ctx.Process(target=_race_config, daemon=True,
+                        args=(model, config, self.backend, self.time_limit, self.warm_start, results))
+            for config in self.configs
+        ]
+        for process in processes:
+            process.start()
+        print(f"Portfolio: racing {len(processes)} {self.backend} configurations "
+              f"({', '.join(config['name'] for config in self.configs)})")
+
+        deadline = time.monotonic() + self.time_limit + GRACE_SECONDS
+        finished = []
+        winner = None
+        while len(finished) < len(processes):
+            try:
+                result = results.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            name, status, sol_status, objective, values, elapsed = result
+            print(f"  {name}: {constants.LpStatus[status]}"
+                  f"{'' if objective is None else f', objective {objective:.4f}'} ({elapsed:.2f} s)")
+            finished.append(result)
+            if sol_status in (constants.LpSolutionOptimal, constants.LpSolutionInfeasible):
+                winner = result
+                break
+
+        for process in processes:
+            if process.is_alive():
+                try:
+                    os.killpg(process.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    # Not yet in its own process group
+                    process.terminate()
+            process.join()
+
+        if winner is None:
+            incumbents = [result for result in finished if result[3] is not None]
+            if incumbents:
+                winner = min(incumbents, key=lambda result: result[3])
+            elif finished:
+                winner = finished[0]
+            else:
+                model.assignStatus(constants.LpStatusNotSolved, constants.LpSolutionNoSolutionFound)
+                return constants.LpStatusNotSolved
+
+        name, status, sol_status, objective, values, elapsed = winner
+        print(f"Portfolio winner: {name}")
+        for v in model.variables():
+            v.varValue = values.get(v.name)
+        model.assignStatus(status, sol_status)
+        return status
@@ -0,0 +1,175 @@
+"""
+Incremental rescheduling after a delay.
+
+Takes the schedule of a previous run (its output.json) and a disruption
+"train T is delayed by X minutes at section S". Only the trains that can
+interact with T from S onwards are re-optimised:
+
+- the delayed train itself,
+- every running train that uses one of T's downstream sections or
+  stations between the time T was due to enter S and the time the delay
+  can reach (T's delayed completion plus the largest separation).
+
+Sections those trains entered before the disruption stay as they were
+(pinned). All other trains keep their previous schedule; those running
+while the affected trains may be rescheduled act as fixed boundary
+conditions in the (small) model, the rest are left out of it.
+"""
+
+import json
+
+from pulp import LpSolutionOptimal, LpSolutionIntegerFeasible
+
+
+def load_previous_schedule(scheduler, filename):
+    """
+    Read the train schedules of a previous output.json into a schedule dict
+    ({'tin', 'tout', 'stopped'}). The rounded output times are nudged so
+    that each train's minimum run times and station dwells hold exactly again.
+    """
+    with open(filename, 'r') as f:
+        results = json.load(f)['train_results']
+
+    sep = scheduler.station_min_separation
+    schedule = {'tin': {}, 'tout': {}, 'stopped': {}}
+    for t in scheduler.trains:
+        result = results.get(str(t))
+        stopped = result is None or result['is_stopped'] or not scheduler.train_info[t].has_valid_path
+        schedule['stopped'][t] = 1 if stopped else 0
+        if stopped:
+            continue
+        steps = {step['section_id']: step for step in result['schedule']}
+        ready = scheduler.earliest_departure[t]
+        for s in scheduler.train_info[t].path:
+            tin = max(steps[s]['entry_time_minutes'], ready)
+            tout = max(steps[s]['exit_time_minutes'], tin + scheduler.run_time[t, s])
+            schedule['tin'][t, s] = tin
+            schedule['tout'][t, s] = tout
+            ready = tout + sep
+    return schedule
+
+
+class DisruptionRescheduler:
+    def __init__(self, scheduler, previous, train, section, delay,
+                 backend='cbc', time_limit=120, warm_start=True):
+        """Re-optimise the trains affected by `train` entering `section` `delay` minutes late."""
+        if previous['stopped'].get(train, 1):
+            raise ValueError(f"Train {train} is not running in the previous schedule")
+        if (train, section) not in previous['tin']:
+            raise ValueError(f"Section {section} is not on the path of train {train}")
+        if delay < 0:
+            raise ValueError("The delay must not be negative")
+        self.scheduler = scheduler
+        self.previous = previous
+        self.train = train
+        self.section = section
+        self.delay = delay
+        self.backend = backend
+        self.time_limit = time_limit
+        self.warm_start = warm_start
+
+    @property
+    def disruption_time(self):
+        """Time the delayed train was due to enter the disrupted section."""
+        return self.previous['tin'][self.train, self.section]
+
+    def _delayed_end(self, t):
+        """Previous completion of train t plus the delay, plus the largest separation."""
+        sch = self.scheduler
+        return self.previous['tout'][t, sch.train_info[t].path[-1]] + self.delay + sch.max_separation
+
+    def affected_trains(self):
+        """
+        Delayed train plus the running trains using its downstream
+        sections/stations between the disruption and the delay's reach.
+        """
+        sch = self.scheduler
+        path = sch.train_info[self.train].path
+        downstream = path[path.index(self.section):]
+        stations = {sch.sec_from[s] for s in downstream} | {sch.sec_to[s] for s in downstream}
+        since = self.disruption_time - sch.train_gap
+        until = self._delayed_end(self.train)
+
+        affected = {self.train}
+        for s in downstream:
+            for t in sch.section_trains[s]:
+                if self.previous['tout'].get((t, s), -1) >= since and \
+                        self.previous['tin'].get((t, s), until) < until:
+                    affected.add(t)
+        for station in stations:
+            for t, s, event in sch.station_events[station]:
+                event_time = self.previous['tout' if event == 'arrival' else 'tin'].get((t, s), -1)
+                if since <= event_time < until:
+                    affected.add(t)
+        return sorted(affected)
+
+    def fixed_trains(self, affected):
+        """
+        The part of the previous schedule that bounds the affected trains:
+        the other running trains with events from the largest separation
+        before the disruption up to the latest delayed completion of an
+        affected train.
+        """
+        sch = self.scheduler
+        since = self.disruption_time - sch.max_separation
+        until = max(self._delayed_end(t) for t in affected)
+        stopped = {}
+        for t, is_stopped in self.previous['stopped'].items():
+            if is_stopped or t in affected or not sch.train_info[t].has_valid_path:
+                continue
+            path = sch.train_info[t].path
+            if self.previous['tout'][t, path[-1]] >= since and self.previous['tin'][t, path[0]] < until:
+                stopped[t] = is_stopped
+        return {'tin': self.previous['tin'], 'tout': self.previous['tout'], 'stopped': stopped}
+
+    def solve(self):
+        """
+        Re-optimise the affected trains and return the updated schedule for
+        all trains, its solution status (LpSolutionOptimal only if the
+        re-optimisation was solved to optimality), the number of
+        re-optimised trains and True if they were placed by the greedy
+        dispatcher because the model had no solution.
+        """
+        sch = self.scheduler
+        affected = self.affected_trains()
+        t0 = self.disruption_time
+        print(f"Disruption: train {self.train} delayed {self.delay} minutes at section "
+              f"{self.section} (due at {t0:.2f}); re-optimising {len(affected)} of "
+              f"{len(sch.trains_with_paths)} trains")
+
+        # Sections entered before the disruption have already been run
+        pinned = {
+            (t, s): (self.previous['tin'][t, s], self.previous['tout'][t, s])
+            for t in affected for s in sch.train_info[t].path
+            if self.previous['tin'][t, s] < t0
+        }
+        # Nothing can be moved into the past; the delayed train enters late
+        release = {
+            (t, s): t0
+            for t in affected for s in sch.train_info[t].path if (t, s) not in pinned
+        }
+        release[self.train, self.section] = t0 + self.delay
+
+        fixed = self.fixed_trains(affected)
+        sch.create_model(trains=affected, fixed=fixed, pinned=pinned, release=release)
+        warm = self.warm_start and sch.warm_start()
+        sch.solve(self.backend, self.time_limit, warm_start=warm)
+
+        if sch.solution_status in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+            part = sch._extract_schedule(affected)
+            status = sch.solution_status
+            fallback = False
+        else:
+            print("Rescheduling: no MIP solution, using greedy dispatch")
+            part = sch.greedy_schedule(within_windows=False)
+            status = LpSolutionIntegerFeasible
+            fallback = True
+
+        schedule = {key: dict(self.previous[key]) for key in ('tin', 'tout', 'stopped')}
+        for t in affected:
+            for s in sch.train_info[t].path:
+                schedule['tin'].pop((t, s), None)
+                schedule['tout'].pop((t, s), None)
+        for key in ('tin', 'tout', 'stopped'):
+            schedule[key].update(part[key])
+        return schedule, status, len(affected), fallback
@@ -0,0 +1,183 @@
+"""
+Content-addressed result cache for the train scheduler.
+
+The key is a SHA-256 of the canonicalised input (sorted keys, numeric
+string keys and integral floats normalised, floats rounded) together with
+the solver settings, so byte-different but semantically identical inputs
+share a result. Results are kept in a small in-memory LRU and in an
+on-disk LRU directory (one JSON file per key, least recently used files
+evicted once the size limit is exceeded).
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from output_writer import atomic_write, dumps
+
+# Bump when a scheduler change alters the results for the same input
+CACHE_VERSION = 1
+
+
+def canonicalize(value):
+    """Canonical form of a JSON value (see module docstring)."""
+    if isinstance(value, dict):
+        return {_canonical_key(k): canonicalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [canonicalize(v) for v in value]
+    if isinstance(value, float):
+        value = round(value, 9)
+        if value.is_integer():
+            return int(value)
+        return value
+    return value
+
+
+def _canonical_key(key):
+    key = str(key).strip()
+    if key.lstrip('-').isdigit():
+        return str(int(key))
+    return key
+
+
+def disk_entries(directory, suffix):
+    """(mtime, size, path) of the files ending in suffix in directory."""
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith(suffix):
+            path = os.path.join(directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+
+def evict_lru(directory, suffix, limit):
+    """
+    Remove the least recently used (oldest mtime) files ending in suffix
+    until those left in directory fit in limit bytes. Returns the number
+    of files removed.
+    """
+    entries = sorted(disk_entries(directory, suffix))
+    total = sum(size for mtime, size, path in entries)
+    evicted = 0
+    for mtime, size, path in entries:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return evicted
+
+
+def touch(path):
+    """Mark a cache file as recently used."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass  # evicted by another process in the meantime
+
+
+def cache_key(data, settings):
+    """Hex digest identifying an input and the settings it is solved with."""
+    payload = json.dumps(
+        {'version': CACHE_VERSION, 'data': canonicalize(data), 'settings': canonicalize(settings)},
+        sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory=None, memory_entries=64, disk_bytes=256 * 1024 * 1024):
+        """
+        LRU cache of output dicts, in memory (up to memory_entries) and,
+        if directory is given, on disk (up to disk_bytes).
+        """
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self.memory = OrderedDict()
+        self.hits = {'memory': 0, 'disk': 0}
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remember(self, key, output):
+        self.memory[key] = output
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """Cached output for key, or None."""
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits['memory'] += 1
+            return self.memory[key]
+
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path, 'r') as f:
+                    output = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass
+            else:
+                touch(path)
+                self._remember(key, output)
+                self.hits['disk'] += 1
+                return output
+
+        self.misses += 1
+        return None
+
+    def put(self, key, output):
+        """Store an output under key."""
+        self._remember(key, output)
+        self.stores += 1
+        if not self.directory:
+            return
+
+        # Written atomically so readers never see a partial entry
+        atomic_write(self._path(key), dumps(output, compact=True))
+        self.evictions += evict_lru(self.directory, '.json', self.disk_bytes)
+
+    def disk_stats(self):
+        """Entry count and size of the cache directory (shared by all processes using it)."""
+        entries = disk_entries(self.directory, '.json')
+        return {
+            'disk_entries': len(entries),
+            'disk_bytes': sum(size for mtime, size, path in entries),
+            'disk_limit_bytes': self.disk_bytes,
+        }
+
+    def stats(self):
+        """
+        Hit/miss counters of this ResultCache instance (i.e. of this process
+        only) and the current size of its memory and disk parts.
+        """
+        lookups = self.hits['memory'] + self.hits['disk'] + self.misses
+        stats = {
+            'hits_memory': self.hits['memory'],
+            'hits_disk': self.hits['disk'],
+            'misses': self.misses,
+            'hit_rate': round((lookups - self.misses) / lookups, 3) if lookups else None,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'memory_entries': len(self.memory),
+            'memory_limit': self.memory_entries,
+        }
+        if self.directory:
+            stats.update(self.disk_stats())
+        return stats
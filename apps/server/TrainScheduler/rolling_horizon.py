@@ -0,0 +1,117 @@
+"""
+Rolling-horizon decomposition for the train scheduler.
+
+Trains are grouped into overlapping time windows by earliest departure.
+Each window is solved as its own (small) MIP in which the trains decided
+in earlier windows are fixed at their scheduled times:
+
+    |---- window k ----|
+              |---- window k+1 ----|
+    | commit  | look-ahead |
+
+Only the trains departing before the start of the next window are
+committed; the look-ahead trains are re-optimised with the next window.
+Only the fixed trains still running within the longest possible
+separation (headway or section clearing time) of the window's earliest
+departure enter its model; earlier ones cannot conflict with it.
+If a window's MIP finds no solution, its trains are placed by the greedy
+dispatcher instead. The committed schedules are stitched into a single
+schedule covering all trains.
+"""
+
+from pulp import LpSolutionOptimal, LpSolutionIntegerFeasible
+
+
+class RollingHorizonSolver:
+    def __init__(self, scheduler, window_minutes=60, overlap_minutes=30,
+                 backend='cbc', time_limit=120, warm_start=True):
+        """Solve an EnhancedDynamicHeadwayTrainScheduler window by window."""
+        if window_minutes <= 0:
+            raise ValueError("window_minutes must be positive")
+        if not 0 <= overlap_minutes < window_minutes:
+            raise ValueError("overlap_minutes must be in [0, window_minutes)")
+        self.scheduler = scheduler
+        self.window_minutes = window_minutes
+        self.overlap_minutes = overlap_minutes
+        self.backend = backend
+        self.time_limit = time_limit
+        self.warm_start = warm_start
+
+    def windows(self):
+        """
+        Split the trains into windows by earliest departure.
+        Returns [(committed trains, look-ahead trains)], in time order.
+        """
+        sch = self.scheduler
+        trains = sorted(sch.trains, key=lambda t: (sch.earliest_departure[t], t))
+        if not trains:
+            return []
+
+        step = self.window_minutes - self.overlap_minutes
+        origin = sch.earliest_departure[trains[0]]
+        windows = []
+        i = 0
+        k = 0
+        while i < len(trains):
+            start = origin + k * step
+            commit_end = start + step
+            window_end = start + self.window_minutes
+            commit = []
+            while i < len(trains) and sch.earliest_departure[trains[i]] < commit_end:
+                commit.append(trains[i])
+                i += 1
+            lookahead = [t for t in trains[i:] if sch.earliest_departure[t] < window_end]
+            if commit:
+                windows.append((commit, lookahead))
+            k += 1
+        return windows
+
+    def solve(self):
+        """
+        Solve all windows and return the stitched schedule
+        ({'tin', 'tout', 'stopped'}) plus the number of windows that fell
+        back to the greedy dispatcher.
+        """
+        sch = self.scheduler
+        fixed = {'tin': {}, 'tout': {}, 'stopped': {}}
+        fallbacks = 0
+        windows = self.windows()
+
+        for k, (commit, lookahead) in enumerate(windows, 1):
+            print(f"\nWindow {k}/{len(windows)}: {len(commit)} trains committed, "
+                  f"{len(lookahead)} look-ahead")
+            sch.create_model(trains=commit + lookahead, fixed=self._relevant_fixed(fixed, commit + lookahead))
+            warm = self.warm_start and sch.warm_start()
+            sch.solve(self.backend, self.time_limit, warm_start=warm)
+
+            if sch.solution_status in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+                schedule = sch._extract_schedule(commit)
+            else:
+                print(f"Window {k}: no MIP solution, using greedy dispatch")
+                fallbacks += 1
+                schedule = sch.greedy_schedule(within_windows=False)
+
+            for t in commit:
+                stopped = schedule['stopped'].get(t, 1)
+                fixed['stopped'][t] = stopped
+                if not stopped:
+                    for s in sch.train_info[t].path:
+                        fixed['tin'][t, s] = schedule['tin'][t, s]
+                        fixed['tout'][t, s] = schedule['tout'][t, s]
+
+        return fixed, fallbacks
+
+    def _relevant_fixed(self, fixed, trains):
+        """
+        The part of the fixed schedule that can interact with the given
+        trains: running trains whose last exit is within the largest
+        separation of the trains' earliest departure.
+        """
+        sch = self.scheduler
+        start = min(sch.earliest_departure[t] for t in trains) - sch.max_separation
+        stopped = {
+            t: stopped for t, stopped in fixed['stopped'].items()
+            if not stopped and sch.train_info[t].has_valid_path
+            and fixed['tout'][t, sch.train_info[t].path[-1]] > start
+        }
+        return {'tin': fixed['tin'], 'tout': fixed['tout'], 'stopped': stopped}
@@ -0,0 +1,83 @@
+"""
+Section routing for the train scheduler.
+
+Builds an outgoing-section adjacency index once from sec_from/sec_to and
+runs Dijkstra weighted by each train's running time on a section
+(sec_dist / min(train_vmax, sec_vmax)). Trains that share an origin, a
+speed and an allowed-section set are routed together in a single search.
+"""
+
+import heapq
+from collections import defaultdict
+
+
+class SectionRouter:
+    def __init__(self, sections, sec_from, sec_to):
+        """Index the network as station -> outgoing sections."""
+        self.sec_to = sec_to
+        self.outgoing = defaultdict(list)
+        for s in sections:
+            self.outgoing[sec_from[s]].append(s)
+
+    def shortest_paths(self, origin, targets, allowed, weight):
+        """
+        Dijkstra from origin over allowed sections, stopping once all targets are settled.
+        Returns the parent section of every settled station.
+        """
+        remaining = set(targets)
+        remaining.discard(origin)
+        dist = {origin: 0.0}
+        parent = {origin: None}
+        settled = set()
+        heap = [(0.0, origin)]
+
+        while heap and remaining:
+            d, station = heapq.heappop(heap)
+            if station in settled:
+                continue
+            settled.add(station)
+            remaining.discard(station)
+
+            for s in self.outgoing.get(station, ()):
+                if s not in allowed:
+                    continue
+                nxt = self.sec_to[s]
+                nd = d + weight(s)
+                if nxt not in settled and nd < dist.get(nxt, float('inf')):
+                    dist[nxt] = nd
+                    parent[nxt] = s
+                    heapq.heappush(heap, (nd, nxt))
+
+        return {station: parent[station] for station in settled}
+
+    def path_to(self, parent, sec_from, target):
+        """Rebuild the section list to target from parent pointers ([] if unreachable)."""
+        if target not in parent:
+            return []
+        path = []
+        station = target
+        while parent[station] is not None:
+            s = parent[station]
+            path.append(s)
+            station = sec_from[s]
+        path.reverse()
+        return path
+
+    def route_trains(self, trains, start_station, end_station, allowed, train_vmax, sec_dist, sec_vmax, sec_from):
+        """
+        Fastest path for every train. Trains with the same origin, speed and
+        allowed-section set share one Dijkstra run to all their destinations.
+        """
+        groups = defaultdict(list)
+        for t in trains:
+            groups[start_station[t], train_vmax[t], frozenset(allowed[t])].append(t)
+
+        paths = {}
+        for (origin, vmax, allowed_set), group in groups.items():
+            def weight(s, vmax=vmax):
+                return (sec_dist[s] / min(vmax, sec_vmax[s])) * 60  # minutes
+
+            parent = self.shortest_paths(origin, {end_station[t] for t in group}, allowed_set, weight)
+            for t in group:
+                paths[t] = self.path_to(parent, sec_from, end_station[t])
+        return paths
@@ -0,0 +1,118 @@
+"""
+Solution snapshot for the train scheduler.
+
+After a solve (or after loading a heuristic schedule) the values of the
+schedule variables are read once into flat arrays: one entry per train
+(stopped flag, completion time) and one entry per scheduled section of a
+running train, in path order (section, entry time, exit time). Train i's
+sections are the slice offsets[i]:offsets[i + 1].
+
+The console report and the JSON output read from the snapshot instead of
+querying the PuLP variables again, so post-processing only touches the
+sections on each train's path, once.
+
+The timeline (all departures and arrivals by time) and the per-section
+usage are derived from the flat arrays with a stable argsort and a
+group-by, instead of building and sorting one Python dict per event.
+"""
+
+import numpy as np
+
+
+class SolutionSnapshot:
+    def __init__(self, trains, stopped, completion, offsets, sections, tin, tout):
+        """Build from the flat arrays described in the module docstring."""
+        self.trains = trains
+        self.position = {t: i for i, t in enumerate(trains)}
+        self.stopped = stopped
+        self.completion = completion
+        self.offsets = offsets
+        self.sections = sections
+        self.tin = tin
+        self.tout = tout
+        # Train of each scheduled section
+        self.section_train = np.repeat(np.asarray(trains, dtype=np.int64), np.diff(offsets))
+
+    @classmethod
+    def from_scheduler(cls, scheduler):
+        """Read the current variable values of a scheduler."""
+        trains = list(scheduler.trains)
+        stopped = np.zeros(len(trains), dtype=bool)
+        completion = np.zeros(len(trains))
+        offsets = np.zeros(len(trains) + 1, dtype=np.int64)
+        sections, tin, tout = [], [], []
+
+        for i, t in enumerate(trains):
+            stopped[i] = (scheduler.train_stopped[t].varValue or 0) >= 0.99
+            if not stopped[i]:
+                completion[i] = scheduler.completion_time[t].varValue or 0
+                for s in scheduler.train_info[t].path:
+                    if (scheduler.selected[t, s].varValue or 0) >= 0.99:
+                        sections.append(s)
+                        tin.append(scheduler.tin[t, s].varValue or 0)
+                        tout.append(scheduler.tout[t, s].varValue or 0)
+            offsets[i + 1] = len(sections)
+
+        return cls(
+            trains, stopped, completion, offsets,
+            np.array(sections, dtype=np.int64), np.array(tin, dtype=float), np.array(tout, dtype=float)
+        )
+
+    def running_trains(self):
+        """Ids of the trains that are not stopped."""
+        return [t for t, stopped in zip(self.trains, self.stopped) if not stopped]
+
+    def is_stopped(self, t):
+        return bool(self.stopped[self.position[t]])
+
+    def completion_time(self, t):
+        return float(self.completion[self.position[t]])
+
+    def train_schedule(self, t):
+        """(sections, entry times, exit times) arrays of train t, in path order."""
+        i = self.position[t]
+        part = slice(self.offsets[i], self.offsets[i + 1])
+        return self.sections[part], self.tin[part], self.tout[part]
+
+    def event_columns(self, sec_from, sec_to):
+        """
+        Timeline of all departures (section entries) and arrivals (section
+        exits) as columns sorted by time (rounded to 3 decimals), given the
+        section endpoints as id-indexed arrays (network.Network):
+        time, row (index of the scheduled section), train, station, section
+        and event (0 = departure, 1 = arrival).
+        Each train's events are interleaved in path order, so the stable
+        argsort keeps the train order and departure-before-arrival on ties.
+        """
+        n = len(self.sections)
+        time = np.empty(2 * n)
+        time[0::2] = self.tin
+        time[1::2] = self.tout
+        time = np.round(time, 3)
+        order = np.argsort(time, kind='stable')
+
+        rows = order // 2
+        event = order % 2
+        section = self.sections[rows]
+        station = np.where(event == 0, sec_from[section], sec_to[section])
+        return {
+            'time': time[order],
+            'row': rows,
+            'train': self.section_train[rows],
+            'station': station,
+            'section': section,
+            'event': event,
+        }
+
+    def section_groups(self):
+        """
+        Scheduled sections grouped by section id: {section: row indices
+        sorted by (rounded) entry time, ties in train order}.
+        """
+        if len(self.sections) == 0:
+            return {}
+        order = np.lexsort((np.round(self.tin, 3), self.sections))
+        sections = self.sections[order]
+        starts = np.flatnonzero(np.diff(sections)) + 1
+        return dict(zip(sections[np.r_[0, starts]].tolist(), np.split(order, starts)))
+
@@ -0,0 +1,183 @@
+"""
+Solver backends for the train scheduler.
+
+- cbc:   PuLP's CBC command (writes the model to disk, spawns the CBC
+         binary and parses the solution file back). This is the default.
+- highs: in-process HiGHS through its Python bindings. The constraint
+         matrix is handed over in one call and the solution vector is read
+         back directly into the PuLP variables, with no file round-trip.
+
+After a solve, backend.bound holds the best bound on the objective (for
+the optimality gap) when the solver reports one: HiGHS always, CBC when
+its log is written to log_path.
+"""
+
+import re
+
+import pulp
+from pulp import constants
+
+try:
+    import highspy
+except ImportError:  # optional dependency
+    highspy = None
+
+
+class CbcCommandBackend:
+    name = 'cbc'
+
+    def __init__(self, msg=True, time_limit=120, threads=None, options=None, warm_start=False, log_path=None):
+        """CBC command-line solver through PuLP (log_path: write the CBC log there instead of stdout)."""
+        self.msg = msg
+        self.time_limit = time_limit
+        self.threads = threads
+        self.options = list(options or [])
+        self.warm_start = warm_start
+        self.log_path = log_path
+        self.bound = None
+
+    def solve(self, model):
+        """Solve the PuLP model and return its LpStatus code."""
+        solver = pulp.PULP_CBC_CMD(
+            msg=self.msg and not self.log_path, timeLimit=self.time_limit,
+            threads=self.threads, options=self.options,
+            warmStart=self.warm_start, logPath=self.log_path
+        )
+        status = model.solve(solver)
+        self.bound = _cbc_log_bound(self.log_path, model) if self.log_path else None
+        return status
+
+
+def _cbc_log_bound(log_path, model):
+    """Best bound from a CBC log: the reported lower bound, or the objective once optimality is proven."""
+    try:
+        with open(log_path) as f:
+            log = f.read()
+    except OSError:
+        return None
+    match = re.search(r'^Lower bound:\s+(\S+)', log, re.MULTILINE)
+    if match:
+        return float(match.group(1))
+    if 'Result - Optimal solution found' in log:
+        return pulp.value(model.objective)
+    return None
+
+
+class HighsBackend:
+    name = 'highs'
+
+    def __init__(self, msg=True, time_limit=120, threads=None, options=None, warm_start=False, log_path=None):
+        """In-process HiGHS solver (requires the highspy package)."""
+        if highspy is None:
+            raise RuntimeError("The 'highs' backend requires the highspy package (pip install highspy)")
+        self.msg = msg
+        self.time_limit = time_limit
+        self.threads = threads
+        self.options = dict(options or {})
+        self.warm_start = warm_start
+        self.log_path = log_path
+        self.bound = None
+
+    def _build_lp(self, model, variables):
+        """Build a HighsLp (row-wise matrix) from the PuLP model."""
+        inf = highspy.kHighsInf
+        index = {v.name: i for i, v in enumerate(variables)}
+        sense = -1 if model.sense == constants.LpMaximize else 1
+
+        lp = highspy.HighsLp()
+        lp.num_col_ = len(variables)
+        lp.num_row_ = len(model.constraints)
+        lp.offset_ = sense * (model.objective.constant or 0.0)
+        lp.col_cost_ = [sense * model.objective.get(v, 0.0) for v in variables]
+        lp.col_lower_ = [-inf if v.lowBound is None else v.lowBound for v in variables]
+        lp.col_upper_ = [inf if v.upBound is None else v.upBound for v in variables]
+        lp.integrality_ = [
+            highspy.HighsVarType.kInteger if v.cat == constants.LpInteger else highspy.HighsVarType.kContinuous
+            for v in variables
+        ]
+
+        row_lower, row_upper = [], []
+        starts, indices, values = [0], [], []
+        for constraint in model.constraints.values():
+            for v, coef in constraint.items():
+                if coef != 0:
+                    indices.append(index[v.name])
+                    values.append(coef)
+            starts.append(len(indices))
+            lb, ub = constraint.getLb(), constraint.getUb()
+            row_lower.append(-inf if lb is None else lb)
+            row_upper.append(inf if ub is None else ub)
+
+        lp.row_lower_ = row_lower
+        lp.row_upper_ = row_upper
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.num_col_ = lp.num_col_
+        lp.a_matrix_.num_row_ = lp.num_row_
+        lp.a_matrix_.start_ = starts
+        lp.a_matrix_.index_ = indices
+        lp.a_matrix_.value_ = values
+        return lp
+
+    def _status(self, highs):
+        """Map the HiGHS model status to PuLP (status, solution status)."""
+        status = highs.getModelStatus()
+        Status = highspy.HighsModelStatus
+        if status == Status.kOptimal:
+            return constants.LpStatusOptimal, constants.LpSolutionOptimal
+        if status in (Status.kInfeasible, Status.kUnboundedOrInfeasible):
+            return constants.LpStatusInfeasible, constants.LpSolutionInfeasible
+        if status == Status.kUnbounded:
+            return constants.LpStatusUnbounded, constants.LpSolutionUnbounded
+        if status in (Status.kTimeLimit, Status.kIterationLimit, Status.kInterrupt,
+                      Status.kObjectiveBound, Status.kObjectiveTarget):
+            if highs.getInfo().primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible:
+                # Same convention as PuLP: a feasible incumbent reports "Optimal"
+                return constants.LpStatusOptimal, constants.LpSolutionIntegerFeasible
+        return constants.LpStatusNotSolved, constants.LpSolutionNoSolutionFound
+
+    def solve(self, model):
+        """Solve the PuLP model in-process and return its LpStatus code."""
+        variables = model.variables()
+
+        highs = highspy.Highs()
+        highs.setOptionValue("output_flag", bool(self.msg or self.log_path))
+        if self.log_path:
+            highs.setOptionValue("log_to_console", bool(self.msg))
+            highs.setOptionValue("log_file", self.log_path)
+        if self.time_limit is not None:
+            highs.setOptionValue("time_limit", float(self.time_limit))
+        if self.threads is not None:
+            highs.setOptionValue("threads", int(self.threads))
+        for key, option_value in self.options.items():
+            highs.setOptionValue(key, option_value)
+
+        highs.passModel(self._build_lp(model, variables))
+        if self.warm_start:
+            start = highspy.HighsSolution()
+            start.col_value = [v.varValue or 0.0 for v in variables]
+            start.value_valid = True
+            highs.setSolution(start)
+        highs.run()
+
+        status, sol_status = self._status(highs)
+        info = highs.getInfo()
+        self.bound = info.mip_dual_bound if model.isMIP() else info.objective_function_value
+        if sol_status in (constants.LpSolutionOptimal, constants.LpSolutionIntegerFeasible):
+            for v, x in zip(variables, highs.getSolution().col_value):
+                v.varValue = x
+        model.assignStatus(status, sol_status)
+        return status
+
+
+SOLVER_BACKENDS = {
+    CbcCommandBackend.name: CbcCommandBackend,
+    HighsBackend.name: HighsBackend,
+}
+
+
+def make_backend(name='cbc', **kwargs):
+    """Create a solver backend by name ('cbc' or 'highs')."""
+    try:
+        return SOLVER_BACKENDS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown solver backend '{name}' (available: {', '.join(SOLVER_BACKENDS)})")
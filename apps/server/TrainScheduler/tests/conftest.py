@@ -0,0 +1,6 @@
+"""The scheduler modules import each other as top-level modules."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,45 @@
+"""Model skeleton snapshots on disk."""
+
+import os
+
+from pulp import LpMinimize, LpProblem, LpVariable
+
+from compiled_model import ModelCache, ModelSkeleton
+
+
+def skeleton(size):
+    model = LpProblem("test", LpMinimize)
+    x = [LpVariable(f"x_{i}", 0, 10) for i in range(size)]
+    model += sum(x)
+    for i in range(size - 1):
+        model += x[i + 1] >= x[i] + 1, f"row_{i}"
+    return ModelSkeleton(model)
+
+
+def test_snapshot_round_trip(tmp_path):
+    ModelCache(str(tmp_path)).put('a', skeleton(5))
+    loaded = ModelCache(str(tmp_path)).get('a')
+    assert sorted(loaded.variables) == [f"x_{i}" for i in range(5)]
+    assert loaded.model.numConstraints() == 4
+    assert [name for name in os.listdir(tmp_path)] == ['a.model.pickle']
+
+
+def test_disk_limit_evicts_least_recently_used(tmp_path):
+    cache = ModelCache(str(tmp_path))
+    cache.put('a', skeleton(5))
+    os.utime(tmp_path / 'a.model.pickle', (1, 1))
+    cache.disk_bytes = int(os.path.getsize(tmp_path / 'a.model.pickle') * 1.5)
+    cache.put('b', skeleton(5))
+    assert sorted(os.listdir(tmp_path)) == ['b.model.pickle']
+    assert ModelCache(str(tmp_path)).get('a') is None
+
+
+def test_failed_write_leaves_no_file(tmp_path):
+    cache = ModelCache(str(tmp_path))
+    broken = skeleton(2)
+    broken.variables = {'x': lambda: None}  # not picklable
+    try:
+        cache.put('a', broken)
+    except Exception:
+        pass
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,59 @@
+"""Vectorized headway engine against the scalar headway rule."""
+
+import numpy as np
+import pytest
+
+from headway import DynamicHeadwayEngine
+
+
+def scalar_headway(speed1, speed2, length, headway1, headway2, safety_margin):
+    """The per-pair rule the engine replaces (train 1 enters first)."""
+    base_headway = max(headway1, headway2)
+    if speed1 >= speed2:
+        return base_headway
+    train1_clear_time = (length / speed1) * 60
+    safe_headway = max(base_headway, train1_clear_time * safety_margin / (speed2 / speed1))
+    return min(safe_headway, train1_clear_time)
+
+
+def random_instance(seed, nb_trains=12, nb_sections=6):
+    rng = np.random.default_rng(seed)
+    section_trains = {
+        s: sorted(rng.choice(np.arange(1, nb_trains + 1), rng.integers(0, nb_trains), replace=False).tolist())
+        for s in range(1, nb_sections + 1)
+    }
+    speeds = {t: {} for t in range(1, nb_trains + 1)}
+    for s, trains in section_trains.items():
+        for t in trains:
+            speeds[t][s] = float(rng.choice([60, 80, 100, 120, 160]))
+    headways = [0.0] + (np.round(rng.uniform(1, 4, nb_trains) * 2) / 2).tolist()
+    sec_dist = [0] + rng.integers(2, 40, nb_sections).tolist()
+    return section_trains, speeds, headways, sec_dist
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_scalar_rule(seed):
+    section_trains, speeds, headways, sec_dist = random_instance(seed)
+    engine = DynamicHeadwayEngine(section_trains, speeds, headways, sec_dist, 1.5)
+
+    for s, trains in section_trains.items():
+        for t1 in trains:
+            for t2 in trains:
+                if t1 == t2:
+                    continue
+                expected = scalar_headway(speeds[t1][s], speeds[t2][s], sec_dist[s],
+                                          headways[t1], headways[t2], 1.5)
+                assert engine.headway(t1, t2, s) == pytest.approx(expected, rel=1e-12)
+        for i, t in enumerate(trains):
+            assert engine.clear_time[s][i] == pytest.approx(sec_dist[s] / speeds[t][s] * 60, rel=1e-12)
+
+
+def test_unused_sections_are_skipped():
+    engine = DynamicHeadwayEngine({1: [], 2: [3]}, {3: {2: 100.0}}, [0, 1, 1, 2], [0, 10, 10], 1.5)
+    assert list(engine.section_trains) == [2]
+    assert engine.required[2] == [[0.0]]
+
+
+def test_empty():
+    engine = DynamicHeadwayEngine({}, {}, [0], [0], 1.5)
+    assert engine.required == {} and engine.clear_time == {}
@@ -0,0 +1,80 @@
+"""Array-backed network and timetable, and the binary network file."""
+
+import numpy as np
+import pytest
+
+from instance_generator import generate_instance, to_dense
+from network import Network, Timetable
+
+
+def instance():
+    return generate_instance('hub', 3, trains_per_hour=8, hours=1, closed_fraction=0.2, seed=5)
+
+
+def test_compact_and_dense_schemas_agree():
+    compact = instance()
+    dense = to_dense(compact)
+    assert Network.from_json(compact).tables() == Network.from_json(dense).tables()
+    assert Network.from_json(compact).station_names == Network.from_json(dense).station_names
+    a, b = Timetable.from_json(compact), Timetable.from_json(dense)
+    assert a.tables() == b.tables()
+    for t in range(1, a.nb_trains + 1):
+        assert a.allowed.sections(t).tolist() == b.allowed.sections(t).tolist()
+        assert a.allowed.section_set(t) == set(compact['allowed_sections'][t - 1])
+
+
+def test_binary_round_trip(tmp_path):
+    network = Network.from_json(instance())
+    filename = tmp_path / 'network.bin'
+    network.save(filename)
+
+    loaded = Network.load(filename)
+    assert isinstance(loaded.sec_from, np.memmap)
+    assert (loaded.nb_stations, loaded.nb_sections) == (network.nb_stations, network.nb_sections)
+    assert loaded.station_names == network.station_names
+    assert loaded.tables() == network.tables()
+    assert loaded.digest() == network.digest()
+
+
+def test_binary_round_trip_float_attributes(tmp_path):
+    data = instance()
+    data['sec_dist'] = [d + 0.25 for d in data['sec_dist']]
+    network = Network.from_json(data)
+    network.save(tmp_path / 'network.bin')
+    loaded = Network.load(tmp_path / 'network.bin')
+    assert loaded.tables() == network.tables()
+    assert loaded.digest() == network.digest()
+
+
+def test_digest_follows_contents():
+    data = instance()
+    digest = Network.from_json(data).digest()
+    assert Network.from_json(to_dense(data)).digest() == digest
+    data['sec_vmax'][0] += 10
+    assert Network.from_json(data).digest() != digest
+
+
+def test_load_rejects_other_npy(tmp_path):
+    filename = tmp_path / 'other.npy'
+    with open(filename, 'wb') as f:
+        np.save(f, np.arange(3))
+        np.save(f, np.arange(3))
+    with pytest.raises(ValueError):
+        Network.load(filename)
+
+
+def test_missing_ids_are_reported():
+    dense = to_dense(instance())
+    del dense['train_vmax']['2']
+    with pytest.raises(ValueError, match="train_vmax: no value for id 2"):
+        Timetable.from_json(dense)
+    dense = to_dense(instance())
+    del dense['station_names']['3']
+    with pytest.raises(ValueError, match="station_names: no value for id 3"):
+        Network.from_json(dense)
+
+
+def test_missing_departures_default_to_zero():
+    dense = to_dense(instance())
+    del dense['earliest_departure']['1']
+    assert Timetable.from_json(dense).earliest_departure[1] == 0.0
@@ -0,0 +1,27 @@
+"""JSON output writer and atomic writes."""
+
+import json
+import os
+
+from output_writer import atomic_write, dumps
+
+DATA = {'metadata': {'solver_status': 'Optimal', 'name': 'Gare du Nord – Ñ'}, 'times': [1, 2.5, None]}
+
+
+def test_layouts_hold_the_same_document():
+    assert json.loads(dumps(DATA)) == json.loads(dumps(DATA, compact=True)) == DATA
+    assert b'\n  ' in dumps(DATA)
+    assert b' ' not in dumps({'a': [1, 2]}, compact=True)
+
+
+def test_atomic_write_replaces_and_follows_umask(tmp_path):
+    filename = tmp_path / 'output.json'
+    filename.write_bytes(b'old')
+    umask = os.umask(0o027)
+    try:
+        atomic_write(filename, b'new')
+    finally:
+        os.umask(umask)
+    assert filename.read_bytes() == b'new'
+    assert filename.stat().st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ['output.json']
@@ -0,0 +1,54 @@
+"""Result cache keys and the memory/disk LRU."""
+
+import os
+
+from instance_generator import generate_instance, to_dense
+from result_cache import ResultCache, cache_key, canonicalize
+
+SETTINGS = {'mode': 'mip', 'time_limit': 120}
+
+
+def test_equivalent_inputs_share_a_key():
+    data = {'nb_trains': 2, 'headway': {'1': 2.0, '2': 1.5}, 'names': ['a', 'b']}
+    same = {'names': ['a', 'b'], 'headway': {' 02': 1.5, '1': 2}, 'nb_trains': 2.0}
+    assert canonicalize(data) == canonicalize(same)
+    assert cache_key(data, SETTINGS) == cache_key(same, dict(reversed(list(SETTINGS.items()))))
+
+
+def test_different_inputs_or_settings_differ():
+    data = to_dense(generate_instance(size=4, trains_per_hour=3, hours=1))
+    key = cache_key(data, SETTINGS)
+    assert cache_key(data, {**SETTINGS, 'time_limit': 60}) != key
+    data['earliest_departure']['1'] += 0.5
+    assert cache_key(data, SETTINGS) != key
+    assert cache_key({'headway': 1.0000000001}, SETTINGS) == cache_key({'headway': 1.0}, SETTINGS)
+    assert cache_key({'headway': 1.001}, SETTINGS) != cache_key({'headway': 1.0}, SETTINGS)
+
+
+def test_memory_lru():
+    cache = ResultCache(memory_entries=2)
+    for key in 'abc':
+        cache.put(key, {'key': key})
+    assert cache.get('a') is None
+    assert cache.get('c') == {'key': 'c'}
+    assert cache.stats()['hits_memory'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_disk_round_trip_and_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), disk_bytes=1000)
+    cache.put('a', {'value': 'x' * 400})
+    os.utime(tmp_path / 'a.json', (1, 1))
+    cache.put('b', {'value': 'y' * 400})
+    assert ResultCache(str(tmp_path)).get('b') == {'value': 'y' * 400}
+
+    cache.put('c', {'value': 'z' * 400})
+    assert not (tmp_path / 'a.json').exists()
+    assert ResultCache(str(tmp_path)).get('a') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_disk_stats_are_shared(tmp_path):
+    ResultCache(str(tmp_path)).put('a', {'value': 1})
+    other = ResultCache(str(tmp_path))
+    assert other.disk_stats()['disk_entries'] == 1
+    assert other.stats()['misses'] == 0 and other.stats()['disk_entries'] == 1
@@ -0,0 +1,50 @@
+"""Section routing against an exhaustive search for the fastest path."""
+
+import pytest
+
+from instance_generator import generate_instance
+from network import Network, Timetable
+from routing import SectionRouter
+
+
+def fastest_time(origin, target, allowed, weight, sec_from, sec_to):
+    """Bellman-Ford running time from origin to target (None if unreachable)."""
+    best = {origin: 0.0}
+    for _ in range(len(sec_from)):
+        changed = False
+        for s in allowed:
+            a, b = sec_from[s], sec_to[s]
+            if a in best and best[a] + weight(s) < best.get(b, float('inf')) - 1e-9:
+                best[b] = best[a] + weight(s)
+                changed = True
+        if not changed:
+            break
+    return best.get(target)
+
+
+@pytest.mark.parametrize('shape,size,closed', [('grid', 4, 0.0), ('grid', 4, 0.3), ('hub', 3, 0.2)])
+def test_paths_are_fastest(shape, size, closed):
+    data = generate_instance(shape, size, trains_per_hour=30, hours=1, closed_fraction=closed, seed=7)
+    network = Network.from_json(data)
+    timetable = Timetable.from_json(data)
+    sec_from, sec_to, sec_dist, sec_vmax = network.tables()
+    start, end, vmax = timetable.tables()[:3]
+    trains = range(1, timetable.nb_trains + 1)
+    allowed = {t: timetable.allowed.section_set(t) for t in trains}
+
+    router = SectionRouter(range(1, network.nb_sections + 1), sec_from, sec_to)
+    paths = router.route_trains(trains, start, end, allowed, vmax, sec_dist, sec_vmax, sec_from)
+
+    for t in trains:
+        def weight(s):
+            return sec_dist[s] / min(vmax[t], sec_vmax[s]) * 60
+
+        expected = fastest_time(start[t], end[t], allowed[t], weight, sec_from, sec_to)
+        path = paths[t]
+        if expected is None:
+            assert path == []
+            continue
+        assert path and set(path) <= allowed[t]
+        assert sec_from[path[0]] == start[t] and sec_to[path[-1]] == end[t]
+        assert all(sec_to[a] == sec_from[b] for a, b in zip(path, path[1:]))
+        assert sum(weight(s) for s in path) == pytest.approx(expected)
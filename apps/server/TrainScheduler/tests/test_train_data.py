@@ -0,0 +1,53 @@
+"""Streaming train_data parser against json.load + compact_train_data."""
+
+import io
+import json
+import os
+
+import pytest
+
+from instance_generator import generate_instance, to_dense
+from network import compact_train_data
+from train_data import read_train_data
+
+SCHEDULER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHUNK_SIZES = [1, 2, 3, 7, 64, 4096, 1 << 20]
+
+
+def documents():
+    compact = generate_instance('grid', 3, trains_per_hour=10, hours=1, closed_fraction=0.3, seed=3)
+    with open(os.path.join(SCHEDULER_DIR, 'sample_train_data.json')) as f:
+        sample = f.read()
+    return {
+        'compact': json.dumps(compact),
+        'dense': json.dumps(to_dense(compact), indent=2),
+        'sample': sample,
+    }
+
+
+DOCUMENTS = documents()
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('name', list(DOCUMENTS))
+def test_matches_json_load(name, chunk_size):
+    text = DOCUMENTS[name]
+    expected = compact_train_data(json.loads(text))
+    assert read_train_data(io.StringIO(text), chunk_size) == expected
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_values_split_across_chunks(chunk_size):
+    text = '{"a": -1.5e-3, "b": "x\\"y\\u00e9", "c": [true, false, null], "d": {}, "e": [],' \
+           ' "allowed_sections": {"1": {"2": 1, "1": 1, "3": 0}, "2": [4, 4, 1]}}'
+    assert read_train_data(io.StringIO(text), chunk_size) == compact_train_data(json.loads(text))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 1 << 20])
+@pytest.mark.parametrize('text', [
+    '', '[]', '{"a": 1', '{"a": 1.}', '{"a": 1e}', '{"a" 1}', '{"a": 1,}', '{"a": 1} x',
+    '{"allowed_sections": {"1": [1, 2}}',
+])
+def test_malformed_input(text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        read_train_data(io.StringIO(text), chunk_size)
@@ -0,0 +1,134 @@
+"""
+Streaming reader for train_data input.
+
+json.load materialises the whole document before anything else happens.
+With the dense schema most of a large input is the allowed_sections
+matrix (one 0/1 entry per train x section), so the reader parses the
+top-level object member by member from fixed-size chunks and reduces
+allowed_sections one train at a time to its list of allowed section ids
+(network.allowed_ids). Only one row of the matrix is ever held in memory,
+and the returned dict is in the compact schema, whose size scales with
+the allowed pairs rather than with trains x sections.
+
+All other members (section attributes, train attributes, names) are
+decoded whole with the C JSON scanner. Malformed input raises
+json.JSONDecodeError, like json.load (its position is counted from the
+start of the chunk being parsed, not from the start of the document).
+"""
+
+import json
+import re
+
+from network import allowed_ids
+
+CHUNK_SIZE = 1 << 20  # characters per read
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+_DECODER = json.JSONDecoder()
+
+
+class _Scanner:
+    """JSON tokens and values from a text stream read in chunks."""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self, size):
+        """Append up to size characters to the buffer; False at the end of the stream."""
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        chunk = self.stream.read(size)
+        if not chunk:
+            self.eof = True
+        self.buffer += chunk
+        return bool(chunk)
+
+    def error(self, message):
+        raise json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self):
+        """Next non-whitespace character ('' at the end of the stream)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read(self.chunk_size):
+                return ''
+
+    def expect(self, chars):
+        """Consume the next character, which must be one of chars, and return it."""
+        char = self.peek()
+        if not char or char not in chars:
+            self.error(f"Expecting {' or '.join(map(repr, chars))}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number at the end of the buffer may continue in the next chunk
+                if self.eof or (end < len(self.buffer) and self.buffer[end] not in _NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            # Grow geometrically so that long values are decoded in linear time
+            self._read(max(self.chunk_size, len(self.buffer)))
+
+    def members(self):
+        """Keys of the object starting here; the caller consumes each member's value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                self.error("Expecting property name")
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def items(self):
+        """Yield once per element of the array starting here; the caller consumes each element."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.expect(',]') == ']':
+                return
+
+
+def _allowed_rows(scanner):
+    """allowed_sections, reduced row by row to lists of allowed section ids."""
+    if scanner.peek() == '[':
+        return [allowed_ids(scanner.value()) for _ in scanner.items()]
+    return {train: allowed_ids(scanner.value()) for train in scanner.members()}
+
+
+def read_train_data(stream, chunk_size=CHUNK_SIZE):
+    """Parse a train_data document from a text stream (see module docstring)."""
+    scanner = _Scanner(stream, chunk_size)
+    data = {}
+    for key in scanner.members():
+        if key == 'allowed_sections' and scanner.peek() in '{[':
+            data[key] = _allowed_rows(scanner)
+        else:
+            data[key] = scanner.value()
+    if scanner.peek():
+        scanner.error("Extra data")
+    return data
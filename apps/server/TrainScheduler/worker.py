@@ -0,0 +1,144 @@
+"""
+Long-lived scheduling worker.
+
+Imports the scheduler (pulp, numpy, CBC discovery) once and then serves
+jobs over a line-based JSON protocol on stdin/stdout, so a server can keep
+a pool of warm workers instead of starting V3.py for every request.
+
+On start the worker writes {"ready": true, "pid": ...}. Each job is one
+line:
+
+    {"id": "job-1", "data": {...train_data...}, "args": ["--mode", "heuristic"]}
+
+`args` takes the same options as the V3.py command line. Each job gets
+one reply line:
+
+    {"id": "job-1", "ok": true, "status": "Optimal", "output": {...output.json...}, "elapsed_seconds": 0.31,
+     "cache": "miss"}
+    {"id": "job-1", "ok": false, "error": "..."}
+
+With --cache-dir, results are served from / stored in a content-addressed
+result cache ("cache" is "hit" or "miss"). The line {"id": ..., "command": "stats"}
+returns this worker's cache counters and the shared cache size; a server
+with several workers adds up the counters of all of them.
+
+Full models are built from compiled skeletons kept across jobs, so a job
+on the same network and trains as an earlier one only updates the model's
+bounds and right-hand sides (see compiled_model.py).
+
+All log output of the scheduler and the solver goes to stderr.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import pulp
+
+from V3 import (EnhancedDynamicHeadwayTrainScheduler, detach_stdout, load_network, parse_args, run_scheduler,
+                settings_key)
+from result_cache import ResultCache, cache_key
+from compiled_model import ModelCache
+from network import compact_train_data
+
+
+def run_job(job, cache=None, model_cache=None):
+    """Run one job and return its reply dict."""
+    start = time.perf_counter()
+    try:
+        args = parse_args(job.get('args', []))
+        # Same input schema as V3.py reads from files (and the same cache keys)
+        data = compact_train_data(job['data'])
+        network = load_network(args.network) if args.network else None
+        key = None
+        if cache is not None and args.mode != 'reschedule':
+            key = cache_key(data, settings_key(args, network))
+            output = cache.get(key)
+            if output is not None:
+                return {
+                    'id': job.get('id'), 'ok': True, 'status': output['metadata']['solver_status'],
+                    'output': output, 'elapsed_seconds': round(time.perf_counter() - start, 3),
+                    'cache': 'hit',
+                }
+        scheduler = EnhancedDynamicHeadwayTrainScheduler(data=data, model_cache=model_cache, network=network)
+        status = run_scheduler(scheduler, args)
+        scheduler.display_results(status)
+        output = scheduler.build_results(status, args.layout)
+    except SystemExit as e:
+        # argparse and load_data report errors by exiting
+        return {'id': job.get('id'), 'ok': False, 'error': f"Scheduler exited with code {e.code}"}
+    except Exception as e:
+        return {'id': job.get('id'), 'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+    reply = {
+        'id': job.get('id'),
+        'ok': output is not None,
+        'status': scheduler.status_name(status),
+        'elapsed_seconds': round(time.perf_counter() - start, 3),
+    }
+    if output is None:
+        reply['error'] = "No solution found"
+    else:
+        reply['output'] = output
+    if key is not None:
+        reply['cache'] = 'miss'
+        if output is not None:
+            cache.put(key, output)
+    return reply
+
+
+def parse_worker_args(argv=None):
+    """Parse worker options."""
+    parser = argparse.ArgumentParser(description="Long-lived train scheduling worker")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Result cache directory (default: no on-disk cache)")
+    parser.add_argument('--cache-entries', type=int, default=64,
+                        help="Results kept in memory (default: 64, 0 disables the cache)")
+    parser.add_argument('--cache-mb', type=float, default=256,
+                        help="On-disk cache size limit in MB (default: 256)")
+    parser.add_argument('--model-cache-entries', type=int, default=4,
+                        help="Compiled model skeletons kept in memory (default: 4, 0 disables)")
+    parser.add_argument('--model-cache-dir', default=None,
+                        help="Trusted directory for compiled model snapshots (default: memory only)")
+    parser.add_argument('--model-cache-mb', type=float, default=1024,
+                        help="On-disk model snapshot size limit in MB (default: 1024)")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Serve jobs from stdin until it is closed."""
+    options = parse_worker_args()
+    cache = None
+    if options.cache_entries > 0:
+        cache = ResultCache(options.cache_dir, options.cache_entries, int(options.cache_mb * 1024 * 1024))
+    model_cache = None
+    if options.model_cache_entries > 0:
+        model_cache = ModelCache(options.model_cache_dir, options.model_cache_entries,
+                                 int(options.model_cache_mb * 1024 * 1024))
+
+    # Scheduler prints and CBC output go to stderr, replies to the original stdout
+    replies = detach_stdout()
+    # Locate the CBC binary up front instead of on the first job
+    pulp.PULP_CBC_CMD(msg=False).available()
+    replies.write(json.dumps({'ready': True, 'pid': os.getpid()}) + "\n")
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            reply = {'id': None, 'ok': False, 'error': f"Invalid job: {e}"}
+        else:
+            if job.get('command') == 'stats':
+                reply = {'id': job.get('id'), 'ok': True, 'pid': os.getpid(),
+                         'stats': cache.stats() if cache else None}
+            else:
+                reply = run_job(job, cache, model_cache)
+        replies.write(json.dumps(reply, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
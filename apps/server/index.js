@@ -4,129 +4,86 @@ const { spawn } = require("child_process");
 const cors = require("cors");
 const fs = require("fs");
 const path = require("path");
+const { SchedulerPool } = require("./schedulerPool");
+const { JobQueue, QueueFullError } = require("./jobQueue");
 
 const app = express();
 app.use(express.json());
 app.use(cors());
 const schedulerDir = path.join(__dirname, "TrainScheduler");
-const trainDataPath = path.join(schedulerDir, "train_data.json");
-const outputPath = path.join(schedulerDir, "output.json");
 const pythonScript = path.join(schedulerDir, "V3.py");
+const workerScript = path.join(schedulerDir, "worker.py");
 
-// Helper function to wait for file to exist and be readable
-function waitForFile(filePath, maxWaitTime = 10000) {
-  return new Promise((resolve, reject) => {
-    const startTime = Date.now();
-
-    const checkFile = () => {
-      try {
-        if (fs.existsSync(filePath)) {
-          // Check if file is readable and not empty
-          const stats = fs.statSync(filePath);
-          if (stats.size > 0) {
-            // Try to read the file to ensure it's complete
-            const content = fs.readFileSync(filePath, "utf-8");
-            JSON.parse(content); // Validate JSON
-            resolve(content);
-            return;
-          }
-        }
-      } catch (err) {
-        // File exists but might not be complete yet
-      }
-
-      if (Date.now() - startTime > maxWaitTime) {
-        reject(new Error("Timeout waiting for output file"));
-        return;
-      }
-
-      // Check again in 100ms
-      setTimeout(checkFile, 100);
-    };
-
-    checkFile();
-  });
-}
-
-app.post("/run", async (req, res) => {
-  const inputData = req.body;
-
-  try {
-    // Ensure the scheduler directory exists
-    if (!fs.existsSync(schedulerDir)) {
-      return res
-        .status(500)
-        .json({ error: "TrainScheduler directory not found" });
-    }
-
-    // Write input data
-    fs.writeFileSync(trainDataPath, JSON.stringify(inputData, null, 2));
-
-    // Remove existing output file if it exists
-    if (fs.existsSync(outputPath)) {
-      fs.unlinkSync(outputPath);
-    }
-
-    console.log(`Starting Python script: ${pythonScript}`);
-    console.log(`Working directory: ${schedulerDir}`);
-    console.log(`Expected output: ${outputPath}`);
+// Persistent scheduler workers; SCHEDULER_WORKERS=0 spawns V3.py per request instead
+const workerCount = Number(process.env.SCHEDULER_WORKERS ?? 2);
+// Content-addressed result cache shared by the workers
+const cacheDir =
+  process.env.SCHEDULER_CACHE_DIR || path.join(schedulerDir, ".cache");
+const cacheArgs = [
+  "--cache-dir",
+  cacheDir,
+  "--cache-mb",
+  String(process.env.SCHEDULER_CACHE_MB || 256),
+];
+const pool =
+  workerCount > 0
+    ? new SchedulerPool({
+        size: workerCount,
+        workerScript,
+        workerArgs: cacheArgs,
+        cwd: schedulerDir,
+      })
+    : null;
 
-    const pyProcess = spawn("python3", [pythonScript], {
-      cwd: schedulerDir,
-      stdio: ["pipe", "pipe", "pipe"],
-    });
+// Run V3.py for one job (no workers). The input is piped to stdin and the
+// results come back on stdout (logs on stderr), so concurrent jobs never
+// share files. Resolves like a worker reply ({ ok, output | error }).
+function spawnScheduler(inputData, args) {
+  return new Promise((resolve, reject) => {
+    const pyProcess = spawn(
+      "python3",
+      [pythonScript, ...args, "--input", "-", "--output", "-", "--cache-dir", cacheDir],
+      {
+        cwd: schedulerDir,
+        stdio: ["pipe", "pipe", "pipe"],
+      },
+    );
 
-    let stdoutData = "";
+    const stdoutChunks = [];
     let stderrData = "";
 
     pyProcess.stdout.on("data", (data) => {
-      const output = data.toString();
-      stdoutData += output;
-      console.log(`Python stdout: ${output}`);
+      stdoutChunks.push(data);
     });
 
     pyProcess.stderr.on("data", (data) => {
-      const error = data.toString();
-      stderrData += error;
-      console.error(`Python stderr: ${error}`);
+      stderrData += data.toString();
     });
 
-    pyProcess.on("close", async (code) => {
+    pyProcess.on("close", (code) => {
       console.log(`Python process exited with code: ${code}`);
 
       if (code !== 0) {
         console.error(`Python stderr output: ${stderrData}`);
-        return res.status(500).json({
+        return resolve({
+          ok: false,
           error: `Python script exited with code ${code}`,
           stderr: stderrData,
-          stdout: stdoutData,
         });
       }
 
+      const stdoutData = Buffer.concat(stdoutChunks).toString("utf-8");
+      if (!stdoutData.trim()) {
+        return resolve({ ok: false, error: "No solution found", stderr: stderrData });
+      }
+
       try {
-        // Wait for the output file to be created and populated
-        console.log(`Waiting for output file: ${outputPath}`);
-        const outputData = await waitForFile(outputPath);
-
-        console.log("Successfully read output file");
-        const result = {
-          input: inputData,
-          output: JSON.parse(outputData),
-        };
-        res.json(result);
+        resolve({ ok: true, output: JSON.parse(stdoutData) });
       } catch (err) {
-        console.error("Error reading output:", err);
-        console.error(
-          "Files in scheduler directory:",
-          fs.readdirSync(schedulerDir),
-        );
-
-        res.status(500).json({
-          error: "Failed to read output JSON",
-          details: err.message,
-          filesInDirectory: fs.readdirSync(schedulerDir),
-          expectedFile: path.basename(outputPath),
-          stdout: stdoutData,
+        console.error("Error parsing scheduler output:", err);
+        resolve({
+          ok: false,
+          error: `Failed to parse output JSON: ${err.message}`,
           stderr: stderrData,
         });
       }
@@ -134,17 +91,203 @@ app.post("/run", async (req, res) => {
 
     pyProcess.on("error", (err) => {
       console.error("Failed to start Python process:", err);
-      res.status(500).json({
-        error: "Failed to start Python process",
-        details: err.message,
-      });
+      reject(new Error(`Failed to start Python process: ${err.message}`));
+    });
+
+    pyProcess.stdin.on("error", (err) => {
+      // The process exited before reading its input; reported on "close"
+      console.error("Failed to write scheduler input:", err.message);
     });
+    pyProcess.stdin.end(JSON.stringify(inputData));
+  });
+}
+
+// Admission control: at most `concurrency` solves run at once (one per
+// worker, or SCHEDULER_CONCURRENCY spawned processes), SCHEDULER_QUEUE_LIMIT
+// more wait and further requests are answered with 429
+const jobs = new JobQueue({
+  run: (job) =>
+    pool ? pool.run(job.data, job.args) : spawnScheduler(job.data, job.args),
+  concurrency:
+    workerCount > 0
+      ? workerCount
+      : Number(process.env.SCHEDULER_CONCURRENCY ?? 2),
+  maxQueued: Number(process.env.SCHEDULER_QUEUE_LIMIT ?? 16),
+  resultTtl: Number(process.env.SCHEDULER_RESULT_TTL_SECONDS ?? 600) * 1000,
+});
+
+const schedulerModes = ["mip", "heuristic", "rolling", "decompose", "portfolio"];
+const outputLayouts = ["records", "columns"];
+// Binary network file (V3.py --save-network); requests that carry only the
+// trains are scheduled on it
+const networkFile = process.env.SCHEDULER_NETWORK_FILE;
+
+// Scheduler arguments for a request, or null after answering 400
+function schedulerArgs(req, res) {
+  // "heuristic" returns a greedy schedule in milliseconds, "mip" optimises it
+  const mode = req.query.mode || req.body.mode || "mip";
+
+  if (!schedulerModes.includes(mode)) {
+    res.status(400).json({
+      error: `Invalid mode "${mode}"`,
+      allowedModes: schedulerModes,
+    });
+    return null;
+  }
+
+  // "columns" returns the timeline and section schedules as one list per field
+  const layout = req.query.layout || "records";
+  if (!outputLayouts.includes(layout)) {
+    res.status(400).json({
+      error: `Invalid layout "${layout}"`,
+      allowedLayouts: outputLayouts,
+    });
+    return null;
+  }
+  const args = ["--mode", mode, "--layout", layout];
+  if (networkFile && req.body.sec_from === undefined) {
+    args.push("--network", networkFile);
+  }
+  return args;
+}
+
+// Queue a job, or answer 429 and return null when the queue is full
+function submitJob(req, res, args) {
+  try {
+    return jobs.submit(req.body, args);
   } catch (err) {
-    console.error("Server error:", err);
-    res.status(500).json({
-      error: "Server error",
-      details: err.message,
+    if (!(err instanceof QueueFullError)) {
+      throw err;
+    }
+    res.set("Retry-After", String(err.retryAfter));
+    res.status(429).json({
+      error: err.message,
+      retryAfterSeconds: err.retryAfter,
+      queue: jobs.stats(),
     });
+    return null;
+  }
+}
+
+// Public view of a job for the async endpoints
+function jobSummary(job) {
+  const summary = {
+    id: job.id,
+    status: job.status,
+    submittedAt: new Date(job.submittedAt).toISOString(),
+    startedAt: job.startedAt && new Date(job.startedAt).toISOString(),
+    finishedAt: job.finishedAt && new Date(job.finishedAt).toISOString(),
+  };
+  if (job.status === "queued") {
+    summary.position = jobs.position(job);
+  } else if (job.status === "done") {
+    summary.output = job.reply.output;
+  } else if (job.status === "failed") {
+    summary.error = job.reply.error;
+  }
+  return summary;
+}
+
+// Synchronous run: waits for the result (blocks the connection while queued)
+app.post("/run", async (req, res) => {
+  const inputData = req.body;
+  const args = schedulerArgs(req, res);
+  if (!args) {
+    return;
+  }
+  const job = submitJob(req, res, args);
+  if (!job) {
+    return;
+  }
+  // A client that gives up while its job is still queued frees the slot
+  res.on("close", () => {
+    if (job.status === "queued") {
+      jobs.cancel(job);
+    }
+  });
+
+  const reply = await job.done;
+  jobs.remove(job.id);
+  if (res.destroyed) {
+    return;
+  }
+  if (!reply.ok) {
+    return res.status(500).json({
+      error: "Scheduler job failed",
+      details: reply.error,
+      status: reply.status,
+      stderr: reply.stderr,
+    });
+  }
+  res.json({ input: inputData, output: reply.output });
+});
+
+// Asynchronous run: returns 202 with the job id, poll GET /jobs/:id
+app.post("/jobs", (req, res) => {
+  const args = schedulerArgs(req, res);
+  if (!args) {
+    return;
+  }
+  const job = submitJob(req, res, args);
+  if (!job) {
+    return;
+  }
+  res.status(202).location(`/jobs/${job.id}`).json(jobSummary(job));
+});
+
+app.get("/jobs/:id", (req, res) => {
+  const job = jobs.get(req.params.id);
+  if (!job) {
+    return res.status(404).json({ error: "Unknown or expired job" });
+  }
+  res.json(jobSummary(job));
+});
+
+// Cancel a queued job (running solves are not interrupted)
+app.delete("/jobs/:id", (req, res) => {
+  const job = jobs.get(req.params.id);
+  if (!job) {
+    return res.status(404).json({ error: "Unknown or expired job" });
+  }
+  if (job.status !== "queued") {
+    return res.status(409).json({ error: `Job is ${job.status}` });
+  }
+  jobs.cancel(job);
+  res.json(jobSummary(job));
+});
+
+// Add up the per-worker cache counters; the disk part is shared by all workers
+function combineCacheStats(replies) {
+  const all = replies.map((reply) => reply.stats).filter(Boolean);
+  if (all.length === 0) {
+    return null;
+  }
+  const counters = ["hits_memory", "hits_disk", "misses", "stores", "evictions", "memory_entries", "memory_limit"];
+  const combined = { workers: all.length };
+  for (const name of counters) {
+    combined[name] = all.reduce((sum, stats) => sum + stats[name], 0);
+  }
+  const hits = combined.hits_memory + combined.hits_disk;
+  const lookups = hits + combined.misses;
+  combined.hit_rate = lookups ? Math.round((hits / lookups) * 1000) / 1000 : null;
+  for (const name of ["disk_entries", "disk_bytes", "disk_limit_bytes"]) {
+    if (name in all[0]) {
+      combined[name] = all[0][name];
+    }
+  }
+  return combined;
+}
+
+// Result cache statistics of all workers (counters since each worker started)
+app.get("/cache/stats", async (req, res) => {
+  if (!pool) {
+    return res.status(404).json({ error: "Scheduler workers are disabled" });
+  }
+  try {
+    const replies = await pool.commandAll("stats");
+    res.json(combineCacheStats(replies));
+  } catch (err) {
+    res.status(500).json({ error: "Scheduler worker error", details: err.message });
   }
 });
 
@@ -156,6 +299,8 @@ app.get("/health", (req, res) => {
     filesInSchedulerDir: fs.existsSync(schedulerDir)
       ? fs.readdirSync(schedulerDir)
       : [],
+    workers: pool ? pool.stats() : null,
+    queue: jobs.stats(),
   };
 
   res.json({
@@ -164,8 +309,6 @@ app.get("/health", (req, res) => {
     paths: {
       schedulerDir,
       pythonScript,
-      trainDataPath,
-      outputPath,
     },
   });
 });
@@ -0,0 +1,134 @@
+// jobQueue.js
+// Bounded job queue in front of the scheduler. At most `concurrency` jobs
+// run at once; up to `maxQueued` more wait in FIFO order and further
+// submissions are refused (the server answers 429). Finished jobs are kept
+// for `resultTtl` ms so that asynchronous clients can poll for them.
+const crypto = require("crypto");
+
+class QueueFullError extends Error {
+  constructor(retryAfter) {
+    super("Scheduler queue is full");
+    this.retryAfter = retryAfter;
+  }
+}
+
+class JobQueue {
+  constructor({ run, concurrency, maxQueued, resultTtl = 10 * 60 * 1000 }) {
+    this.run = run; // (job) => Promise<{ ok, output | error, ... }>
+    this.concurrency = concurrency;
+    this.maxQueued = maxQueued;
+    this.resultTtl = resultTtl;
+    this.jobs = new Map();
+    this.waiting = [];
+    this.running = 0;
+    this.completed = 0;
+    this.rejected = 0;
+    this.runSeconds = []; // recent run times, for the Retry-After estimate
+  }
+
+  // Queue a job; throws QueueFullError when the queue is at its limit
+  submit(data, args = []) {
+    if (this.waiting.length >= this.maxQueued) {
+      this.rejected++;
+      throw new QueueFullError(this.retryAfter());
+    }
+    const job = {
+      id: crypto.randomUUID(),
+      data,
+      args,
+      status: "queued",
+      submittedAt: Date.now(),
+      startedAt: null,
+      finishedAt: null,
+      reply: null,
+    };
+    job.done = new Promise((resolve) => {
+      job.resolve = resolve;
+    });
+    this.jobs.set(job.id, job);
+    this.waiting.push(job);
+    this.dispatch();
+    return job;
+  }
+
+  get(id) {
+    return this.jobs.get(id);
+  }
+
+  // Position of a queued job (1 = next to start), 0 once it has started
+  position(job) {
+    return this.waiting.indexOf(job) + 1;
+  }
+
+  dispatch() {
+    while (this.running < this.concurrency && this.waiting.length > 0) {
+      const job = this.waiting.shift();
+      this.running++;
+      job.status = "running";
+      job.startedAt = Date.now();
+      this.run(job)
+        .catch((err) => ({ ok: false, error: err.message }))
+        .then((reply) => this.finish(job, reply));
+    }
+  }
+
+  finish(job, reply) {
+    this.running--;
+    this.completed++;
+    job.status = reply.ok ? "done" : "failed";
+    job.finishedAt = Date.now();
+    job.reply = reply;
+    job.data = null; // the input is not needed any more
+    this.runSeconds.push((job.finishedAt - job.startedAt) / 1000);
+    if (this.runSeconds.length > 20) {
+      this.runSeconds.shift();
+    }
+    setTimeout(() => this.jobs.delete(job.id), this.resultTtl).unref();
+    job.resolve(reply);
+    this.dispatch();
+  }
+
+  // Drop a job that has not started yet
+  cancel(job) {
+    const index = this.waiting.indexOf(job);
+    if (index === -1) {
+      return false;
+    }
+    this.waiting.splice(index, 1);
+    job.status = "cancelled";
+    job.finishedAt = Date.now();
+    job.reply = { ok: false, error: "Cancelled" };
+    job.data = null;
+    setTimeout(() => this.jobs.delete(job.id), this.resultTtl).unref();
+    job.resolve(job.reply);
+    return true;
+  }
+
+  // Forget a finished job whose result has been delivered
+  remove(id) {
+    this.jobs.delete(id);
+  }
+
+  // Seconds until a queue slot is likely to free up
+  retryAfter() {
+    if (this.runSeconds.length === 0) {
+      return 5;
+    }
+    const mean =
+      this.runSeconds.reduce((sum, s) => sum + s, 0) / this.runSeconds.length;
+    return Math.max(1, Math.ceil(mean / this.concurrency));
+  }
+
+  stats() {
+    return {
+      concurrency: this.concurrency,
+      running: this.running,
+      queued: this.waiting.length,
+      maxQueued: this.maxQueued,
+      completed: this.completed,
+      rejected: this.rejected,
+    };
+  }
+}
+
+module.exports = { JobQueue, QueueFullError };
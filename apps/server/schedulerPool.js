@@ -0,0 +1,149 @@
+// schedulerPool.js
+// Pool of long-lived Python scheduling workers (TrainScheduler/worker.py).
+// Each worker imports the scheduler once and then serves jobs over a
+// line-based JSON protocol on stdin/stdout, so requests do not pay for
+// interpreter startup and the pulp import.
+const { spawn } = require("child_process");
+const readline = require("readline");
+
+class SchedulerPool {
+  constructor({
+    size,
+    workerScript,
+    workerArgs = [],
+    cwd,
+    python = "python3",
+    respawnDelay = 1000,
+  }) {
+    this.size = size;
+    this.workerScript = workerScript;
+    this.workerArgs = workerArgs;
+    this.cwd = cwd;
+    this.python = python;
+    this.respawnDelay = respawnDelay;
+    this.workers = [];
+    this.queue = [];
+    this.nextJobId = 1;
+    this.closed = false;
+
+    for (let i = 0; i < size; i++) {
+      this.spawnWorker(i);
+    }
+  }
+
+  spawnWorker(index) {
+    const proc = spawn(this.python, [this.workerScript, ...this.workerArgs], {
+      cwd: this.cwd,
+      stdio: ["pipe", "pipe", "pipe"],
+    });
+    const worker = { index, proc, ready: false, job: null };
+    this.workers[index] = worker;
+
+    readline.createInterface({ input: proc.stdout }).on("line", (line) => {
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch (err) {
+        console.error(`Scheduler worker ${index}: invalid reply: ${line}`);
+        return;
+      }
+
+      if (message.ready) {
+        console.log(`Scheduler worker ${index} ready (pid ${message.pid})`);
+      } else if (worker.job) {
+        worker.job.resolve(message);
+      }
+      worker.ready = true;
+      worker.job = null;
+      this.dispatch();
+    });
+
+    proc.stderr.on("data", (data) => {
+      console.error(`Scheduler worker ${index}: ${data.toString()}`);
+    });
+
+    proc.on("error", (err) => {
+      console.error(`Failed to start scheduler worker ${index}:`, err);
+    });
+
+    proc.on("close", (code) => {
+      console.error(`Scheduler worker ${index} exited with code ${code}`);
+      worker.ready = false;
+      if (worker.job) {
+        worker.job.reject(new Error(`Scheduler worker exited with code ${code}`));
+        worker.job = null;
+      }
+      if (!this.closed) {
+        setTimeout(() => this.spawnWorker(index), this.respawnDelay);
+      }
+    });
+  }
+
+  // Hand queued jobs to idle workers (jobs for a given worker wait for it)
+  dispatch() {
+    for (const worker of this.workers) {
+      if (this.queue.length === 0) {
+        return;
+      }
+      if (worker && worker.ready && !worker.job) {
+        const next = this.queue.findIndex(
+          (job) => job.workerIndex === undefined || job.workerIndex === worker.index,
+        );
+        if (next < 0) {
+          continue;
+        }
+        const [job] = this.queue.splice(next, 1);
+        worker.job = job;
+        const message = job.command
+          ? { id: job.id, command: job.command }
+          : { id: job.id, data: job.data, args: job.args };
+        worker.proc.stdin.write(JSON.stringify(message) + "\n");
+      }
+    }
+  }
+
+  // Run a job; resolves with the worker reply ({ id, ok, status, output | error })
+  run(data, args = []) {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ id: `job-${this.nextJobId++}`, data, args, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  // Send a protocol command (e.g. "stats") to the next idle worker, or to
+  // the worker with the given index
+  command(name, workerIndex) {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ id: `job-${this.nextJobId++}`, command: name, workerIndex, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  // Send a protocol command to every worker; resolves with all replies
+  commandAll(name) {
+    return Promise.all(this.workers.map((worker, index) => this.command(name, index)));
+  }
+
+  stats() {
+    return {
+      size: this.size,
+      ready: this.workers.filter((w) => w && w.ready).length,
+      busy: this.workers.filter((w) => w && w.job).length,
+      queued: this.queue.length,
+    };
+  }
+
+  close() {
+    this.closed = true;
+    for (const worker of this.workers) {
+      if (worker) {
+        worker.proc.stdin.end();
+      }
+    }
+    for (const job of this.queue.splice(0)) {
+      job.reject(new Error("Scheduler pool closed"));
+    }
+  }
+}
+
+module.exports = { SchedulerPool };